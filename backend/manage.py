@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Operational commands for the backend.
+
+Usage:
+    python manage.py backfill-revenue [--days 365]
+    python manage.py backfill-low-stock
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+import typer
+
+import server
+
+cli = typer.Typer(help="Operational commands for the backend")
+
+
+@cli.command("backfill-revenue")
+def backfill_revenue(
+    days: Optional[int] = typer.Option(None, help="Only rebuild the last N days (default: all history)")
+):
+    """Rebuild the revenue_daily rollups from the orders collection"""
+    async def run():
+        await server.ensure_revenue_indexes()
+        since = None
+        if days:
+            since = datetime.combine(datetime.utcnow().date() - timedelta(days=days - 1), datetime.min.time())
+        return await server.backfill_revenue_rollups(since)
+
+    buckets = asyncio.run(run())
+    typer.echo(f"Rebuilt {buckets} revenue_daily buckets")
+
+
+@cli.command("backfill-low-stock")
+def backfill_low_stock():
+    """Derive the low_stock flag behind store-manager inventory alerts for every product"""
+    async def run():
+        await server.ensure_product_indexes()
+        return await server.backfill_low_stock()
+
+    updated = asyncio.run(run())
+    typer.echo(f"Updated low_stock on {updated} products")
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,44 +1,202 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Header, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from starlette.datastructures import UploadFile
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing import List, Optional, Dict, Any, AsyncIterator, Callable
 import uuid
-from datetime import datetime, timedelta
+import json
+import base64
+import csv
+import io
+import time
+import hashlib
+import asyncio
+import math
+import re
+import heapq
+import resource
+import threading
+import traceback
+import sys
+import gc
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import accumulate
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 import random
+import zlib
+import orjson
+import numpy as np
 import jwt
+from jwt.algorithms import get_default_algorithms
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
 from passlib.context import CryptContext
 
+try:
+    import brotli
+except ImportError:  # optional: "br" is simply not offered
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: "zstd" is simply not offered
+    zstandard = None
+
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+class BucketHistogram:
+    """Prometheus-style histogram: fixed upper bounds, a count per bound plus +Inf"""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def cumulative(self) -> List[tuple]:
+        """(le, cumulative count) pairs ending with +Inf"""
+        pairs, running = [], 0
+        for bound, count in zip(self.bounds + (math.inf,), self.counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+class ConnectionPoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts Mongo pool checkouts and how long callers waited for a connection
+
+    pymongo emits these events on motor's executor threads. A check-out's start and
+    its outcome happen on the same thread, so a thread-local holds the start time.
+    """
+
+    WAIT_BOUNDS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.connections = 0
+        self.wait_seconds = BucketHistogram(self.WAIT_BOUNDS)
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "started", None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.wait_seconds.observe(waited)
+
+    def connection_check_out_failed(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+            self.wait_seconds.observe(waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+mongo_pool_metrics = ConnectionPoolMetrics()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_pool_metrics])
 db = client[os.environ['DB_NAME']]
 
 # JWT and Authentication Configuration
-JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-here-change-in-production')
-JWT_ALGORITHM = "HS256"
+JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'EdDSA')  # EdDSA or RS256
 JWT_EXPIRE_HOURS = 24
+JWT_KEY_ROTATION_HOURS = int(os.environ.get('JWT_KEY_ROTATION_HOURS', 24 * 7))
+JWT_KEY_REFRESH_SECONDS = int(os.environ.get('JWT_KEY_REFRESH_SECONDS', 60))
+# Optional passphrase used to encrypt private keys at rest in the signing_keys collection
+JWT_KEY_PASSPHRASE = os.environ.get('JWT_KEY_PASSPHRASE')
+
+# Authenticated principal cache
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', 300))
+
+# Token revocation
+REVOCATION_SYNC_SECONDS = int(os.environ.get('REVOCATION_SYNC_SECONDS', 5))
+
+# Order listing limits
+ORDER_LIST_DEFAULT_LIMIT = 100
+ORDER_LIST_MAX_LIMIT = 1000
+
+# Analytics summary cache
+ANALYTICS_SUMMARY_SOFT_TTL_SECONDS = int(os.environ.get('ANALYTICS_SUMMARY_SOFT_TTL_SECONDS', 30))
+ANALYTICS_SUMMARY_HARD_TTL_SECONDS = int(os.environ.get('ANALYTICS_SUMMARY_HARD_TTL_SECONDS', 600))
+
+# Status check paging and streaming
+STATUS_CHECK_PAGE_SIZE = 1000
+STATUS_CHECK_MAX_PAGE_SIZE = 5000
+STREAM_BATCH_SIZE = 500
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+DEMO_PASSWORD = "password123"
 
 # HTTP Bearer for token authentication
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # Create the main app without a prefix
 app = FastAPI()
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+# orjson renders the response_model output several times faster than json.dumps
+api_router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 
 # Define Models
@@ -166,6 +324,34 @@ class Product(BaseModel):
     outlet_ids: List[str] = []  # Available at these outlets
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ProductLookupRequest(BaseModel):
+    codes: List[str] = Field(..., min_length=1, max_length=500)  # barcodes or SKUs
+
+class ProductLookupResponse(BaseModel):
+    products: Dict[str, Product]  # keyed by scanned code
+    missing: List[str] = []
+
+class ReservationItem(BaseModel):
+    product_id: str
+    quantity: int = Field(..., gt=0)
+
+class ReservationCreate(BaseModel):
+    items: List[ReservationItem] = Field(..., min_length=1, max_length=100)
+    ttl_seconds: Optional[int] = Field(None, gt=0, le=3600)
+    order_id: Optional[str] = None
+
+class InventoryReservation(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    items: List[ReservationItem]
+    status: str  # pending (taking stock), held, committed, released
+    order_id: Optional[str] = None
+    expires_at: datetime
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class InventoryAdjustment(BaseModel):
+    delta: int  # positive restocks, negative writes off
+    reason: Optional[str] = None
+
 class Order(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     order_number: str
@@ -174,6 +360,7 @@ class Order(BaseModel):
     customer_phone: str
     customer_email: str
     outlet_id: str
+    tenant_id: Optional[str] = None
     items: List[Dict[str, Any]]  # [{"product_id": "...", "name": "...", "quantity": 2, "price": 10.99}]
     subtotal: float
     tax: float
@@ -185,9 +372,27 @@ class Order(BaseModel):
     delivery_address: str
     delivery_partner_id: Optional[str] = None
     estimated_delivery: Optional[datetime] = None
+    refunded_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class OrderStatusChange(BaseModel):
+    order_id: str
+    status: str
+    delivery_partner_id: Optional[str] = None
+
+class OrderStatusBatch(BaseModel):
+    changes: List[OrderStatusChange] = Field(..., min_length=1, max_length=10_000)
+
+class OrderStatusResult(BaseModel):
+    order_id: str
+    result: str  # updated, refunded, not_found, superseded (a later change for the same order won)
+
+class OrderStatusBatchResponse(BaseModel):
+    results: List[OrderStatusResult]  # one per change, in request order
+    updated: int
+    not_found: int
+
 class DeliveryPartner(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -245,103 +450,849 @@ class AuditLog(BaseModel):
     ip_address: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
-# Helper function to generate mock analytics data
-def generate_mock_revenue_data(days: int = 30) -> List[RevenueMetrics]:
-    base_date = datetime.now() - timedelta(days=days)
-    data = []
+# Response fast paths
+# FastAPI validates whatever an endpoint returns against its response_model before
+# serializing it. Returning a Response skips that step, so list endpoints that already
+# hold validated models, or documents this service wrote from the model itself, encode
+# them directly. response_model stays on the route for the OpenAPI schema.
+class ListSerializer:
+    """Precompiled JSON encoders for List[model] responses"""
+
+    def __init__(self, model):
+        self.adapter = TypeAdapter(List[model])
+        # Only the model's fields leave the database, so internal bookkeeping fields stay private
+        self.projection = {"_id": 0, **{name: 1 for name in model.model_fields}}
+        # Fields added to the model after a document was written get their default
+        self.defaults = {
+            name: field.default for name, field in model.model_fields.items()
+            if not field.is_required() and field.default_factory is None
+        }
+
+    def models(self, items: list, headers: Optional[dict] = None) -> Response:
+        """Encode model instances in one pass, without validating them again"""
+        return Response(self.adapter.dump_json(items), media_type="application/json", headers=headers)
+
+    def documents(self, documents: List[dict], headers: Optional[dict] = None) -> Response:
+        """Encode documents read with `projection`; they were validated when written"""
+        fields = self.defaults.keys()
+        documents = [document if fields <= document.keys() else {**self.defaults, **document} for document in documents]
+        return Response(orjson.dumps(documents), media_type="application/json", headers=headers)
+
+    def document_json(self, document: dict) -> bytes:
+        """One document's model fields as JSON, for responses assembled from cached parts"""
+        return orjson.dumps({
+            name: document[name] if name in document else self.defaults[name]
+            for name in self.projection if name in document or name in self.defaults
+        })
+
+ORDER_LIST = ListSerializer(Order)
+PRODUCT_LIST = ListSerializer(Product)
+OUTLET_LIST = ListSerializer(BusinessOutlet)
+BUSINESS_USER_LIST = ListSerializer(BusinessUser)
+STATUS_CHECK_LIST = ListSerializer(StatusCheck)
+REVENUE_METRICS_LIST = ListSerializer(RevenueMetrics)
+USER_BEHAVIOR_METRICS_LIST = ListSerializer(UserBehaviorMetrics)
+PERFORMANCE_METRICS_LIST = ListSerializer(PerformanceMetrics)
+
+# Vectorized analytics engine
+# Metrics are computed over parallel column arrays (one entry per order or rollup row),
+# where `days` holds each row's day offset from the start of the reporting window and
+# `codes` holds dictionary-encoded ids (tenants, customers). Every function is a
+# handful of numpy passes, so cost grows with rows, not with rows x days.
+MONTHLY_ACTIVE_WINDOW_DAYS = 30
+
+def day_index(timestamps: np.ndarray, start) -> np.ndarray:
+    """Whole days between each datetime64 timestamp and the `start` date"""
+    return (timestamps.astype("datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+
+def safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division that yields 0 wherever the denominator is 0"""
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+def growth_rates(series: np.ndarray) -> np.ndarray:
+    """Period-over-period growth, 0 where the previous period was 0"""
+    previous = np.concatenate(([0.0], series[:-1]))
+    return safe_divide(series - previous, previous)
+
+def daily_totals(days: np.ndarray, values: np.ndarray, n_days: int) -> np.ndarray:
+    """Sum of `values` per day"""
+    return np.bincount(days, weights=values, minlength=n_days)[:n_days]
+
+def active_pairs(days: np.ndarray, codes: np.ndarray, n_days: int) -> np.ndarray:
+    """Sorted unique (code, day) pairs packed as code * n_days + day"""
+    # sort + adjacent compare; np.unique is several times slower on large int arrays
+    pairs = np.sort(codes.astype(np.int64) * n_days + days)
+    keep = np.empty(len(pairs), dtype=bool)
+    keep[:1] = True
+    np.not_equal(pairs[1:], pairs[:-1], out=keep[1:])
+    return pairs[keep]
+
+def distinct_per_day(pairs: np.ndarray, n_days: int) -> np.ndarray:
+    """Number of distinct codes seen on each day, from active_pairs()"""
+    return np.bincount(pairs % n_days, minlength=n_days)[:n_days]
+
+def retention_per_day(pairs: np.ndarray, n_days: int) -> np.ndarray:
+    """Share of each day's active codes that were also active the day before, from active_pairs()"""
+    pair_days = pairs % n_days
+    # Pairs are sorted and unique, so (code, day - 1) exists exactly when it is the previous element
+    returning = np.zeros(len(pairs), dtype=bool)
+    returning[1:] = (np.diff(pairs) == 1) & (pair_days[1:] > 0)
+    active = np.bincount(pair_days, minlength=n_days)[:n_days]
+    retained = np.bincount(pair_days[returning], minlength=n_days)[:n_days]
+    return safe_divide(retained.astype(float), np.concatenate(([0], active[:-1])).astype(float))
+
+def rolling_distinct(pairs: np.ndarray, n_days: int, window: int) -> np.ndarray:
+    """Distinct codes active at least once in the trailing `window` days, from active_pairs()"""
+    pair_days = pairs % n_days
+    # Each active day covers [day, day + window), cut short where the same code is active again
+    next_day = np.full(len(pairs), n_days, dtype=np.int64)
+    same_code = (pairs[1:] // n_days) == (pairs[:-1] // n_days)
+    next_day[:-1][same_code] = pair_days[1:][same_code]
+    ends = np.minimum(np.minimum(pair_days + window, next_day), n_days)
+    coverage = np.bincount(pair_days, minlength=n_days + 1) - np.bincount(ends, minlength=n_days + 1)
+    return np.cumsum(coverage)[:n_days]
+
+async def load_order_activity(since: datetime) -> tuple:
+    """Load (datetime64 day, encoded customer_id) columns of the days customers ordered on since `since`
+
+    Mongo reduces the orders to one document per customer listing its distinct order
+    days, so what crosses the wire and the Python work grow with customers, not orders.
+    """
+    days, customers = [], []
+    cursor = db.orders.aggregate([
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": "$customer_id",
+            "days": {"$addToSet": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}}
+        }}
+    ], allowDiskUse=True, batchSize=STREAM_BATCH_SIZE)
+    code = 0
+    async for customer in cursor:
+        days.extend(customer["days"])
+        customers.extend([code] * len(customer["days"]))
+        code += 1
+    return np.array(days, dtype="datetime64[D]"), np.array(customers, dtype=np.int64)
+
+def generate_mock_engagement_data(days: int) -> Dict[str, np.ndarray]:
+    """Session and feature-usage figures, which have no event source yet"""
+    rng = np.random.default_rng()
+    return {
+        "session_duration_avg": rng.uniform(12.5, 25.8, days),
+        "page_views_per_user": rng.integers(4, 9, days),
+        "feature_usage": {
+            "dashboard": rng.integers(800, 1501, days),
+            "orders": rng.integers(600, 1201, days),
+            "analytics": rng.integers(200, 501, days),
+            "settings": rng.integers(150, 401, days),
+            "reports": rng.integers(100, 301, days)
+        },
+        "login_frequency": {
+            "daily": rng.integers(40, 61, days),
+            "weekly": rng.integers(25, 36, days),
+            "monthly": rng.integers(15, 26, days)
+        }
+    }
+
+async def load_user_behavior_metrics(days: int) -> List[UserBehaviorMetrics]:
+    """Build one UserBehaviorMetrics per day (oldest first) from customer order activity"""
+    start = datetime.utcnow().date() - timedelta(days=days - 1)
+    # Reach back a full window so monthly actives on the first day are complete
+    window_start = start - timedelta(days=MONTHLY_ACTIVE_WINDOW_DAYS - 1)
+    n_days = days + MONTHLY_ACTIVE_WINDOW_DAYS - 1
     
-    for i in range(days):
-        date = base_date + timedelta(days=i)
-        # Simulate growing revenue with some fluctuation
-        base_revenue = 15000 + (i * 200) + random.randint(-2000, 3000)
-        tenant_count = 45 + random.randint(-5, 10)
-        
-        data.append(RevenueMetrics(
-            date=date.strftime("%Y-%m-%d"),
-            total_revenue=base_revenue,
-            tenant_count=tenant_count,
-            avg_revenue_per_tenant=base_revenue / tenant_count,
-            subscription_revenue=base_revenue * 0.7,
-            transaction_revenue=base_revenue * 0.3,
-            growth_rate=random.uniform(0.02, 0.08)
-        ))
+    days_active, customers = await load_order_activity(datetime.combine(window_start, datetime.min.time()))
+    order_days = day_index(days_active, window_start)
+    in_window = order_days < n_days
+    pairs = active_pairs(order_days[in_window], customers[in_window], n_days)
+    daily_active = distinct_per_day(pairs, n_days)[-days:]
+    monthly_active = rolling_distinct(pairs, n_days, MONTHLY_ACTIVE_WINDOW_DAYS)[-days:]
+    retention = retention_per_day(pairs, n_days)[-days:]
+    engagement = generate_mock_engagement_data(days)
+    page_views = daily_active * engagement["page_views_per_user"]
     
-    return data
+    return [
+        UserBehaviorMetrics(
+            date=(start + timedelta(days=i)).strftime("%Y-%m-%d"),
+            daily_active_users=int(daily_active[i]),
+            monthly_active_users=int(monthly_active[i]),
+            session_duration_avg=float(engagement["session_duration_avg"][i]),
+            page_views=int(page_views[i]),
+            feature_usage={name: int(values[i]) for name, values in engagement["feature_usage"].items()},
+            login_frequency={name: int(values[i]) for name, values in engagement["login_frequency"].items()},
+            user_retention_rate=float(retention[i])
+        )
+        for i in range(days)
+    ]
 
-def generate_mock_user_behavior_data(days: int = 30) -> List[UserBehaviorMetrics]:
-    base_date = datetime.now() - timedelta(days=days)
-    data = []
-    
-    for i in range(days):
-        date = base_date + timedelta(days=i)
-        dau = random.randint(1200, 2500)
+# Helper function to generate mock analytics data
+# Performance time-series store
+# Each worker keeps its own samples in fixed-size ring buffers, one per resolution tier.
+# A sample is folded into every tier as it is recorded, so a query reads pre-aggregated
+# slots from a single tier and memory is fixed no matter how long the process runs.
+PERFORMANCE_SAMPLE_SECONDS = 10
+PERFORMANCE_TIERS = [
+    (10, 360),     # 10s slots, last hour
+    (60, 360),     # 1m slots, last 6 hours
+    (300, 288),    # 5m slots, last 24 hours
+    (3600, 720),   # 1h slots, last 30 days
+]
+# Percentile histograms use log-spaced buckets, each 10% wider than the last
+HISTOGRAM_MIN_VALUE = 0.001
+HISTOGRAM_GROWTH = 1.1
+HISTOGRAM_BUCKETS = int(math.log(1e7 / HISTOGRAM_MIN_VALUE) / math.log(HISTOGRAM_GROWTH)) + 1
+
+def histogram_bucket(value: float) -> int:
+    if value <= HISTOGRAM_MIN_VALUE:
+        return 0
+    return min(int(math.log(value / HISTOGRAM_MIN_VALUE) / math.log(HISTOGRAM_GROWTH)), HISTOGRAM_BUCKETS - 1)
+
+def histogram_value(bucket: int) -> float:
+    """Representative (geometric midpoint) value of a histogram bucket"""
+    return HISTOGRAM_MIN_VALUE * HISTOGRAM_GROWTH ** (bucket + 0.5)
+
+class TimeSeriesTier:
+    """Ring buffer of count/sum/min/max (and optionally a histogram) per fixed-width slot"""
+
+    def __init__(self, resolution: int, capacity: int, histograms: bool):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.slots = [-1] * capacity
+        self.counts = [0] * capacity
+        self.sums = [0.0] * capacity
+        self.mins = [math.inf] * capacity
+        self.maxs = [-math.inf] * capacity
+        self.histograms: Optional[list] = [None] * capacity if histograms else None
+
+    def record(self, timestamp: float, count: int, total: float, low: float, high: float, buckets: Dict[int, int]):
+        slot = int(timestamp // self.resolution)
+        index = slot % self.capacity
+        if self.slots[index] != slot:
+            # Slot last held data one full ring ago; recycle it
+            self.slots[index] = slot
+            self.counts[index] = 0
+            self.sums[index] = 0.0
+            self.mins[index] = math.inf
+            self.maxs[index] = -math.inf
+            if self.histograms is not None:
+                self.histograms[index] = None
+        self.counts[index] += count
+        self.sums[index] += total
+        if low < self.mins[index]:
+            self.mins[index] = low
+        if high > self.maxs[index]:
+            self.maxs[index] = high
+        if self.histograms is not None:
+            histogram = self.histograms[index]
+            if histogram is None:
+                histogram = self.histograms[index] = array("I", bytes(4 * HISTOGRAM_BUCKETS))
+            for bucket, bucket_count in buckets.items():
+                histogram[bucket] += bucket_count
+
+    def span(self) -> int:
+        return self.resolution * self.capacity
+
+class TimeSeriesStore:
+    """Named series, each recorded into every tier of PERFORMANCE_TIERS"""
+
+    def __init__(self, tiers: List[tuple]):
+        self.tiers = tiers
+        self.series: Dict[str, List[TimeSeriesTier]] = {}
+
+    def register(self, name: str, percentiles: bool = False):
+        """Declare a series up front; only series with percentiles pay for histograms"""
+        self.series[name] = [TimeSeriesTier(resolution, capacity, percentiles) for resolution, capacity in self.tiers]
+
+    def record(self, name: str, value: float, timestamp: Optional[float] = None):
+        self.record_many(name, [value], timestamp)
+
+    def record_many(self, name: str, values: List[float], timestamp: Optional[float] = None):
+        """Fold a batch of samples taken around `timestamp` into every tier at once"""
+        if not values:
+            return
+        buckets: Dict[int, int] = {}
+        if self.series[name][0].histograms is not None:
+            for value in values:
+                bucket = histogram_bucket(value)
+                buckets[bucket] = buckets.get(bucket, 0) + 1
+        self.record_summary(name, len(values), sum(values), min(values), max(values), buckets, timestamp)
+
+    def record_summary(self, name: str, count: int, total: float, low: float, high: float,
+                       buckets: Dict[int, int], timestamp: Optional[float] = None):
+        """Fold samples already reduced to count/sum/min/max and histogram buckets"""
+        if not count:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        for tier in self.series[name]:
+            tier.record(timestamp, count, total, low, high, buckets)
+
+    def pick_tier(self, name: str, start: float, step: int) -> TimeSeriesTier:
+        """Finest tier that still reaches back to `start` and is no coarser than `step`"""
+        tiers = self.series[name]
+        age = time.time() - start
+        for tier in tiers:
+            if tier.resolution <= step and tier.span() >= age:
+                return tier
+        return tiers[-1]
+
+    def query(self, name: str, start: float, end: float, step: int) -> List[dict]:
+        """Aggregates for each `step`-wide bucket in [start, end), oldest first"""
+        tier = self.pick_tier(name, start, step)
+        n_buckets = max(1, int(math.ceil((end - start) / step)))
+        counts = [0] * n_buckets
+        sums = [0.0] * n_buckets
+        mins = [math.inf] * n_buckets
+        maxs = [-math.inf] * n_buckets
+        histograms: List[Optional[array]] = [None] * n_buckets
+        for index, slot in enumerate(tier.slots):
+            slot_start = slot * tier.resolution
+            if slot < 0 or not tier.counts[index] or slot_start < start or slot_start >= end:
+                continue
+            bucket = int((slot_start - start) // step)
+            counts[bucket] += tier.counts[index]
+            sums[bucket] += tier.sums[index]
+            mins[bucket] = min(mins[bucket], tier.mins[index])
+            maxs[bucket] = max(maxs[bucket], tier.maxs[index])
+            if tier.histograms is not None and tier.histograms[index] is not None:
+                if histograms[bucket] is None:
+                    histograms[bucket] = array("I", tier.histograms[index])
+                else:
+                    merged = histograms[bucket]
+                    for position, count in enumerate(tier.histograms[index]):
+                        if count:
+                            merged[position] += count
         
-        data.append(UserBehaviorMetrics(
-            date=date.strftime("%Y-%m-%d"),
-            daily_active_users=dau,
-            monthly_active_users=dau * random.randint(8, 12),
-            session_duration_avg=random.uniform(12.5, 25.8),
-            page_views=dau * random.randint(4, 8),
-            feature_usage={
-                "dashboard": random.randint(800, 1500),
-                "orders": random.randint(600, 1200),
-                "analytics": random.randint(200, 500),
-                "settings": random.randint(150, 400),
-                "reports": random.randint(100, 300)
-            },
-            login_frequency={
-                "daily": random.randint(40, 60),
-                "weekly": random.randint(25, 35),
-                "monthly": random.randint(15, 25)
-            },
-            user_retention_rate=random.uniform(0.75, 0.92)
-        ))
-    
-    return data
+        points = []
+        for bucket in range(n_buckets):
+            count = counts[bucket]
+            point = {
+                "start": start + bucket * step,
+                "count": count,
+                "sum": sums[bucket],
+                "avg": sums[bucket] / count if count else 0.0,
+                "min": mins[bucket] if count else 0.0,
+                "max": maxs[bucket] if count else 0.0
+            }
+            if tier.histograms is not None:
+                for label, rank in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                    point[label] = self.percentile(histograms[bucket], count, rank, point["min"], point["max"])
+            points.append(point)
+        return points
+
+    @staticmethod
+    def percentile(histogram: Optional[array], count: int, rank: float, low: float, high: float) -> float:
+        if not histogram or not count:
+            return 0.0
+        target = rank * count
+        seen = 0
+        for bucket, bucket_count in enumerate(histogram):
+            seen += bucket_count
+            if bucket_count and seen >= target:
+                return min(max(histogram_value(bucket), low), high)
+        return high
+
+performance_store = TimeSeriesStore(PERFORMANCE_TIERS)
+performance_store.register("up")
+performance_store.register("cpu_usage")
+performance_store.register("memory_usage")
+performance_store.register("active_sessions")
+performance_store.register("database_connections")
+performance_store.register("api_response_time", percentiles=True)
+performance_store.register("http_errors")
 
-def generate_mock_performance_data(hours: int = 24) -> List[PerformanceMetrics]:
-    base_time = datetime.now() - timedelta(hours=hours)
-    data = []
+PROCESS_STARTED_AT = time.time()
+
+class ProcessSampler:
+    """Records process CPU and memory usage into the performance store"""
+
+    def __init__(self):
+        self.last_wall = time.monotonic()
+        self.last_cpu = self.cpu_seconds()
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.total_memory = os.sysconf("SC_PHYS_PAGES") * self.page_size
+
+    @staticmethod
+    def cpu_seconds() -> float:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+
+    def rss_bytes(self) -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * self.page_size
+        except OSError:
+            # ru_maxrss is the peak, in KiB on Linux; good enough where /proc is missing
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    async def sample(self):
+        now = time.monotonic()
+        cpu = self.cpu_seconds()
+        elapsed = now - self.last_wall
+        if elapsed > 0:
+            performance_store.record("cpu_usage", (cpu - self.last_cpu) / elapsed * 100)
+        self.last_wall, self.last_cpu = now, cpu
+        performance_store.record("memory_usage", self.rss_bytes() / self.total_memory * 100)
+        performance_store.record("active_sessions", len(principal_cache))
+        performance_store.record("database_connections", mongo_pool_metrics.connections)
+        performance_store.record("up", 1)
+
+process_sampler = ProcessSampler()
+
+def load_performance_metrics(hours: int) -> List[PerformanceMetrics]:
+    """Build one PerformanceMetrics per hour (oldest first) from the performance store"""
+    step = 3600
+    end = (time.time() // step + 1) * step
+    start = end - hours * step
+    
+    def series(name):
+        return performance_store.query(name, start, end, step)
     
+    up, cpu, memory = series("up"), series("cpu_usage"), series("memory_usage")
+    sessions, connections = series("active_sessions"), series("database_connections")
+    latency, errors = series("api_response_time"), series("http_errors")
+    
+    now = time.time()
+    metrics = []
     for i in range(hours):
-        timestamp = base_time + timedelta(hours=i)
-        
-        data.append(PerformanceMetrics(
-            timestamp=timestamp,
-            api_response_time=random.uniform(85, 250),
-            error_rate=random.uniform(0.1, 2.5),
-            uptime_percentage=random.uniform(99.2, 100.0),
-            cpu_usage=random.uniform(15, 85),
-            memory_usage=random.uniform(45, 78),
-            database_connections=random.randint(12, 45),
-            active_sessions=random.randint(150, 400)
+        bucket_start = start + i * step
+        # Uptime counts sampler ticks against the part of the hour this worker has existed for
+        covered = min(bucket_start + step, now) - max(bucket_start, PROCESS_STARTED_AT)
+        uptime = min(100.0, up[i]["count"] * PERFORMANCE_SAMPLE_SECONDS / covered * 100) if covered > 0 else 0.0
+        metrics.append(PerformanceMetrics(
+            timestamp=datetime.utcfromtimestamp(bucket_start),
+            api_response_time=latency[i]["avg"],
+            error_rate=errors[i]["count"] / latency[i]["count"] * 100 if latency[i]["count"] else 0.0,
+            uptime_percentage=uptime,
+            cpu_usage=cpu[i]["avg"],
+            memory_usage=memory[i]["avg"],
+            database_connections=int(round(connections[i]["avg"])),
+            active_sessions=int(sessions[i]["max"])
         ))
+    return metrics
+
+# Request latency instrumentation
+# HDR-style histogram: values below 2**LATENCY_SUB_BUCKET_BITS microseconds get exact buckets,
+# larger ones keep LATENCY_SUB_BUCKET_BITS significant bits (under 1% relative error).
+LATENCY_SUB_BUCKET_BITS = 7
+LATENCY_HALF_BUCKET = 1 << (LATENCY_SUB_BUCKET_BITS - 1)
+LATENCY_MAX_MICROS = (1 << 36) - 1  # ~19 hours; anything slower is clamped
+LATENCY_BUCKETS = (36 - LATENCY_SUB_BUCKET_BITS + 2) * LATENCY_HALF_BUCKET
+UNMATCHED_ROUTE = "<unmatched>"
+# Clients may send any token as a method; the rest share one key so they can't mint routes
+LATENCY_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+OTHER_METHOD = "OTHER"
+
+def route_template(scope) -> str:
+    """Template of the route FastAPI matched for this request (set once routing has run)"""
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+def latency_bucket(micros: int) -> int:
+    shift = micros.bit_length() - LATENCY_SUB_BUCKET_BITS
+    if shift <= 0:
+        return micros
+    return shift * LATENCY_HALF_BUCKET + (micros >> shift)
+
+def latency_bucket_value(bucket: int) -> float:
+    """Midpoint, in microseconds, of the values that fall into `bucket`"""
+    if bucket < 2 * LATENCY_HALF_BUCKET:
+        return float(bucket)
+    shift = bucket // LATENCY_HALF_BUCKET - 1
+    return ((bucket - shift * LATENCY_HALF_BUCKET) << shift) + (1 << shift) / 2
+
+class RouteLatency:
+    """Latency histogram and status-class counts for one method + route template"""
+
+    __slots__ = ("histogram", "count", "total_micros", "max_micros", "status_classes")
+
+    def __init__(self):
+        self.histogram = array("Q", bytes(8 * LATENCY_BUCKETS))
+        self.count = 0
+        self.total_micros = 0
+        self.max_micros = 0
+        self.status_classes = [0] * 6  # index = status // 100; 0 = no response sent
+
+    def record(self, micros: int, status_code: int):
+        self.histogram[latency_bucket(micros)] += 1
+        self.count += 1
+        self.total_micros += micros
+        if micros > self.max_micros:
+            self.max_micros = micros
+        self.status_classes[status_code // 100 if status_code < 600 else 0] += 1
+
+    def percentile(self, rank: float) -> float:
+        target = rank * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return min(latency_bucket_value(bucket), self.max_micros)
+        return float(self.max_micros)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": self.total_micros / self.count / 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) / 1000,
+            "p95_ms": self.percentile(0.95) / 1000,
+            "p99_ms": self.percentile(0.99) / 1000,
+            "max_ms": self.max_micros / 1000,
+            "status_classes": {f"{index}xx": count for index, count in enumerate(self.status_classes) if index and count},
+            "no_response": self.status_classes[0]
+        }
+
+class RequestMetrics:
+    """Per-route latency histograms plus the in-flight request gauge
+
+    Latencies are also reduced to count/sum/min/max and histogram buckets as they
+    arrive and folded into the performance store's api_response_time and
+    http_errors series by `flush`, which keeps the multi-tier store off the
+    request path and the pending state a fixed size.
+    """
+
+    def __init__(self):
+        self.routes: Dict[tuple, RouteLatency] = {}
+        self.in_flight = 0
+        self.reset_pending()
+
+    def reset_pending(self):
+        self.pending_count = 0
+        self.pending_total = 0.0
+        self.pending_low = math.inf
+        self.pending_high = -math.inf
+        self.pending_buckets: Dict[int, int] = {}
+        self.pending_errors = 0
+
+    def record(self, method: str, path: str, elapsed: float, status_code: int):
+        if path == UNMATCHED_ROUTE or method not in LATENCY_METHODS:
+            method = OTHER_METHOD
+        stats = self.routes.get((method, path))
+        if stats is None:
+            stats = self.routes[(method, path)] = RouteLatency()
+        stats.record(min(int(elapsed * 1_000_000), LATENCY_MAX_MICROS), status_code)
+        millis = elapsed * 1000
+        self.pending_count += 1
+        self.pending_total += millis
+        if millis < self.pending_low:
+            self.pending_low = millis
+        if millis > self.pending_high:
+            self.pending_high = millis
+        bucket = histogram_bucket(millis)
+        self.pending_buckets[bucket] = self.pending_buckets.get(bucket, 0) + 1
+        if status_code >= 500 or status_code == 0:
+            self.pending_errors += 1
+
+    async def flush(self):
+        count, total, low, high = self.pending_count, self.pending_total, self.pending_low, self.pending_high
+        buckets, errors = self.pending_buckets, self.pending_errors
+        self.reset_pending()
+        now = time.time()
+        performance_store.record_summary("api_response_time", count, total, low, high, buckets, now)
+        if errors:
+            performance_store.record_many("http_errors", [1] * errors, now)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "routes": [
+                {"method": method, "route": path, **stats.summary()}
+                for (method, path), stats in sorted(self.routes.items(), key=lambda item: item[0][1])
+            ]
+        }
+
+request_metrics = RequestMetrics()
+
+class LatencyMiddleware:
+    """Pure ASGI middleware timing every HTTP request by route template
+
+    The route is read from scope["route"] after the app returns; FastAPI's router
+    writes the matched APIRoute into the shared scope, so the key is the template
+    (e.g. /api/super-admin/orders/{order_id}/status) rather than the raw path.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            metrics.record(scope["method"], route_template(scope), elapsed, status_code)
+
+# Revenue rollups
+# revenue_daily holds one small document per (tenant, outlet, day). Payments and refunds
+# $inc it as they happen, so revenue analytics never scan the orders collection.
+DEFAULT_TENANT_ID = "default"
+REVENUE_ORDER_PROJECTION = {
+    "_id": 0, "tenant_id": 1, "outlet_id": 1, "created_at": 1,
+    "subtotal": 1, "tax": 1, "delivery_fee": 1, "total": 1
+}
+
+async def ensure_revenue_indexes():
+    """Create the rollup key and day-range indexes"""
+    await db.revenue_daily.create_index(
+        [("tenant_id", ASCENDING), ("outlet_id", ASCENDING), ("day", ASCENDING)], unique=True
+    )
+    await db.revenue_daily.create_index("day")
+
+def revenue_bucket(order: dict, day: datetime) -> dict:
+    """Key of the rollup bucket of the order's tenant and outlet for `day`"""
+    return {
+        "tenant_id": order.get("tenant_id") or DEFAULT_TENANT_ID,
+        "outlet_id": order["outlet_id"],
+        "day": day.strftime("%Y-%m-%d")
+    }
+
+async def apply_revenue_delta(order: dict, day: datetime, inc: Dict[str, float]):
+    """Add `inc` to the rollup bucket of the order's tenant and outlet for `day`"""
+    await db.revenue_daily.update_one(revenue_bucket(order, day), {"$inc": inc}, upsert=True)
+
+async def record_order_payment(order: dict):
+    """Book a paid order on the day it was placed"""
+    await apply_revenue_delta(order, order["created_at"], {
+        "orders": 1,
+        "gross": order["total"],
+        "net": order["total"],
+        "subtotal": order["subtotal"],
+        "tax": order["tax"],
+        "delivery_fee": order["delivery_fee"]
+    })
+
+def refund_delta(order: dict) -> Dict[str, float]:
+    return {"refunded_orders": 1, "refunds": order["total"], "net": -order["total"]}
+
+async def record_order_refund(order: dict, refunded_at: datetime):
+    """Book a refund on the day it was issued"""
+    await apply_revenue_delta(order, refunded_at, refund_delta(order))
+
+async def record_order_refunds(orders: List[dict], refunded_at: datetime):
+    """Book many refunds issued together, one $inc per rollup bucket in a single bulk write"""
+    buckets: Dict[tuple, Dict[str, float]] = {}
+    for order in orders:
+        bucket = revenue_bucket(order, refunded_at)
+        inc = buckets.setdefault(tuple(bucket.values()), {})
+        for field, value in refund_delta(order).items():
+            inc[field] = inc.get(field, 0) + value
+    if buckets:
+        await db.revenue_daily.bulk_write([
+            UpdateOne(dict(zip(("tenant_id", "outlet_id", "day"), bucket)), {"$inc": inc}, upsert=True)
+            for bucket, inc in buckets.items()
+        ], ordered=False)
+
+async def backfill_revenue_rollups(since: Optional[datetime] = None) -> int:
+    """Rebuild revenue_daily from the orders collection, returning the number of buckets written
+
+    Grouping runs inside Mongo, so only the per-day buckets cross the wire. Buckets in the
+    range are replaced wholesale; run it while order traffic is quiet, since payments
+    recorded between the aggregation and the write would be overwritten.
+    """
+    def day_of(field):
+        return {"$dateToString": {"format": "%Y-%m-%d", "date": field}}
+    
+    def bucket(field):
+        return {"tenant_id": {"$ifNull": ["$tenant_id", DEFAULT_TENANT_ID]}, "outlet_id": "$outlet_id", "day": day_of(field)}
     
-    return data
+    paid_match = {"payment_status": {"$in": ["paid", "refunded"]}}
+    refund_match = {"payment_status": "refunded"}
+    # Orders refunded before refunded_at was stored fall back to updated_at
+    refunded_at = {"$ifNull": ["$refunded_at", "$updated_at"]}
+    if since:
+        paid_match["created_at"] = {"$gte": since}
+        refund_match["$or"] = [
+            {"refunded_at": {"$gte": since}},
+            {"refunded_at": None, "updated_at": {"$gte": since}}
+        ]
+    
+    buckets: Dict[tuple, dict] = {}
+    paid = db.orders.aggregate([
+        {"$match": paid_match},
+        {"$group": {
+            "_id": bucket("$created_at"),
+            "orders": {"$sum": 1},
+            "gross": {"$sum": "$total"},
+            "subtotal": {"$sum": "$subtotal"},
+            "tax": {"$sum": "$tax"},
+            "delivery_fee": {"$sum": "$delivery_fee"}
+        }}
+    ])
+    async for row in paid:
+        key = row.pop("_id")
+        buckets[(key["tenant_id"], key["outlet_id"], key["day"])] = {**row, "refunded_orders": 0, "refunds": 0.0}
+    
+    # Refunds are booked on the day they were issued (refunded_at), matching record_order_refund
+    refunds = db.orders.aggregate([
+        {"$match": refund_match},
+        {"$group": {"_id": bucket(refunded_at), "refunded_orders": {"$sum": 1}, "refunds": {"$sum": "$total"}}}
+    ])
+    async for row in refunds:
+        key = row.pop("_id")
+        entry = buckets.setdefault((key["tenant_id"], key["outlet_id"], key["day"]), {
+            "orders": 0, "gross": 0.0, "subtotal": 0.0, "tax": 0.0, "delivery_fee": 0.0
+        })
+        entry.update(row)
+    
+    if since:
+        await db.revenue_daily.delete_many({"day": {"$gte": since.strftime("%Y-%m-%d")}})
+    else:
+        await db.revenue_daily.delete_many({})
+    
+    operations = [
+        UpdateOne(
+            {"tenant_id": tenant_id, "outlet_id": outlet_id, "day": day},
+            {"$set": {**totals, "net": totals["gross"] - totals["refunds"]}},
+            upsert=True
+        )
+        for (tenant_id, outlet_id, day), totals in buckets.items()
+    ]
+    for offset in range(0, len(operations), STREAM_BATCH_SIZE):
+        await db.revenue_daily.bulk_write(operations[offset:offset + STREAM_BATCH_SIZE], ordered=False)
+    return len(operations)
+
+async def load_revenue_metrics(days: int) -> List[RevenueMetrics]:
+    """Build one RevenueMetrics per day (oldest first) from the rollups"""
+    today = datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    per_day = db.revenue_daily.aggregate([
+        # Bound both ends: a future-dated order books a rollup day past today
+        {"$match": {"day": {"$gte": start.strftime("%Y-%m-%d"), "$lte": today.strftime("%Y-%m-%d")}}},
+        {"$group": {"_id": "$day", "net": {"$sum": "$net"}, "tenants": {"$addToSet": "$tenant_id"}}}
+    ])
+    revenue = np.zeros(days)
+    tenant_counts = np.zeros(days, dtype=np.int64)
+    async for row in per_day:
+        offset = (datetime.strptime(row["_id"], "%Y-%m-%d").date() - start).days
+        revenue[offset] = row["net"]
+        tenant_counts[offset] = len(row["tenants"])
+    
+    per_tenant = safe_divide(revenue, tenant_counts)
+    growth = growth_rates(revenue)
+    return [
+        RevenueMetrics(
+            date=(start + timedelta(days=i)).strftime("%Y-%m-%d"),
+            total_revenue=float(revenue[i]),
+            tenant_count=int(tenant_counts[i]),
+            avg_revenue_per_tenant=float(per_tenant[i]),
+            # Orders only carry transaction revenue; subscriptions are billed outside the order flow
+            subscription_revenue=0.0,
+            transaction_revenue=float(revenue[i]),
+            growth_rate=float(growth[i])
+        )
+        for i in range(days)
+    ]
 
 # Analytics API endpoints
 @api_router.get("/analytics/revenue", response_model=List[RevenueMetrics])
-async def get_revenue_analytics(days: int = 30):
+async def get_revenue_analytics(days: int = Query(30, ge=1, le=3660)):
     """Get revenue analytics data for the specified number of days"""
-    return generate_mock_revenue_data(days)
+    return REVENUE_METRICS_LIST.models(await load_revenue_metrics(days))
 
 @api_router.get("/analytics/user-behavior", response_model=List[UserBehaviorMetrics])
-async def get_user_behavior_analytics(days: int = 30):
+async def get_user_behavior_analytics(days: int = Query(30, ge=1, le=3660)):
     """Get user behavior analytics data"""
-    return generate_mock_user_behavior_data(days)
+    return USER_BEHAVIOR_METRICS_LIST.models(await load_user_behavior_metrics(days))
 
 @api_router.get("/analytics/performance", response_model=List[PerformanceMetrics])
-async def get_performance_analytics(hours: int = 24):
-    """Get system performance metrics"""
-    return generate_mock_performance_data(hours)
+async def get_performance_analytics(hours: int = Query(24, ge=1, le=720)):
+    """Get this worker's performance metrics, one point per hour"""
+    return PERFORMANCE_METRICS_LIST.models(load_performance_metrics(hours))
 
-@api_router.get("/analytics/summary", response_model=AnalyticsSummary)
-async def get_analytics_summary():
-    """Get consolidated analytics summary"""
-    # Calculate summary from recent data
-    revenue_data = generate_mock_revenue_data(7)  # Last 7 days
-    behavior_data = generate_mock_user_behavior_data(7)
-    performance_data = generate_mock_performance_data(24)  # Last 24 hours
+@api_router.get("/analytics/performance/series/{name}")
+async def get_performance_series(
+    name: str,
+    hours: float = Query(1, gt=0, le=720),
+    step: int = Query(60, ge=10, le=86400)
+):
+    """Get min/max/avg (and percentiles where tracked) for one performance series"""
+    if name not in performance_store.series:
+        raise HTTPException(status_code=404, detail=f"Unknown series: {name}")
+    end = (time.time() // step + 1) * step
+    return performance_store.query(name, end - hours * 3600, end, step)
+
+class StaleWhileRevalidateCache:
+    """Caches a single computed value and refreshes it in the background once it goes stale
+
+    Within `soft_ttl` the cached value is served as-is. Between `soft_ttl` and `hard_ttl`
+    it is still served immediately while one background refresh runs; concurrent callers
+    share that refresh instead of starting their own. Past `hard_ttl` (or before the first
+    load) callers wait for the shared refresh.
+    """
+
+    def __init__(self, loader: Callable, soft_ttl: float, hard_ttl: float):
+        self.loader = loader
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.value = None
+        self.computed_at = 0.0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def get(self):
+        age = time.monotonic() - self.computed_at
+        if self.value is not None and age < self.hard_ttl:
+            if age >= self.soft_ttl:
+                self.stale_hits += 1
+                self._start_refresh()
+            else:
+                self.hits += 1
+            return self.value
+        self.misses += 1
+        # Shielded so a disconnecting client does not cancel the refresh other callers share
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._load())
+            self._refresh.add_done_callback(self._log_failure)
+        return self._refresh
+
+    async def _load(self):
+        value = await self.loader()
+        self.value = value
+        self.computed_at = time.monotonic()
+        self.refreshes += 1
+        return value
+
+    def _log_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            self.refresh_failures += 1
+            logger.error("Refreshing %s failed", self.loader.__qualname__, exc_info=task.exception())
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "age_seconds": time.monotonic() - self.computed_at if self.value is not None else None
+        }
+
+async def compute_analytics_summary() -> AnalyticsSummary:
+    """Calculate the consolidated summary from recent data"""
+    revenue_data = await load_revenue_metrics(14)  # Last 14 days, split into this week and last
+    behavior_data = await load_user_behavior_metrics(7)
+    performance_data = [p for p in load_performance_metrics(24) if p.uptime_percentage > 0]  # Last 24 hours
     
     recent_revenue = sum([r.total_revenue for r in revenue_data[-7:]])
     previous_revenue = sum([r.total_revenue for r in revenue_data[-14:-7]]) if len(revenue_data) >= 14 else recent_revenue * 0.9
@@ -354,9 +1305,18 @@ async def get_analytics_summary():
         conversion_rate=random.uniform(3.2, 8.7),
         churn_rate=random.uniform(2.1, 5.4),
         avg_session_duration=sum([b.session_duration_avg for b in behavior_data]) / len(behavior_data),
-        system_uptime=sum([p.uptime_percentage for p in performance_data]) / len(performance_data)
+        system_uptime=sum([p.uptime_percentage for p in performance_data]) / len(performance_data) if performance_data else 0.0
     )
 
+analytics_summary_cache = StaleWhileRevalidateCache(
+    compute_analytics_summary, ANALYTICS_SUMMARY_SOFT_TTL_SECONDS, ANALYTICS_SUMMARY_HARD_TTL_SECONDS
+)
+
+@api_router.get("/analytics/summary", response_model=AnalyticsSummary)
+async def get_analytics_summary():
+    """Get consolidated analytics summary (served from cache, refreshed in the background)"""
+    return await analytics_summary_cache.get()
+
 @api_router.get("/analytics/tenant-performance")
 async def get_tenant_performance_analytics():
     """Get tenant-specific performance analytics"""
@@ -591,33 +1551,303 @@ def generate_mock_orders():
 
 
 # Authentication Utility Functions
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
+def hash_password_sync(password: str) -> str:
+    """Hash a password using bcrypt (blocking, runs in the password pool)"""
     return pwd_context.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (blocking, runs in the password pool)"""
     return pwd_context.verify(plain_password, hashed_password)
 
+# bcrypt holds the CPU for tens of milliseconds, so it runs in worker processes rather
+# than on the event loop. The semaphore bounds queued work: once PASSWORD_HASH_MAX_PENDING
+# jobs are waiting, new logins are shed with a 503 instead of growing the queue.
+password_executor: Optional[ProcessPoolExecutor] = None
+password_slots = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+
+async def run_password_job(job: Callable, *args):
+    """Run a bcrypt job in the password pool, rejecting it if the pool is saturated"""
+    if password_slots.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication is busy, please retry",
+            headers={"Retry-After": "1"}
+        )
+    async with password_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, job, *args)
+
+async def hash_password(password: str) -> str:
+    """Hash a password using bcrypt"""
+    return await run_password_job(hash_password_sync, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash"""
+    return await run_password_job(verify_password_sync, plain_password, hashed_password)
+
+async def start_password_pool():
+    """Start the bcrypt worker processes"""
+    global password_executor
+    password_executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+
+class SigningKeyRing:
+    """kid-tagged asymmetric JWT keys shared by all workers through the signing_keys collection
+
+    Time is split into rotation slots of JWT_KEY_ROTATION_HOURS. The key for slot N signs
+    tokens during that slot and keeps verifying them until the last token it signed expires.
+    The key for slot N+1 is created (and published in the JWKS) a full slot before it
+    starts signing, so workers and edge verifiers always hold it before they see it used.
+    Keys are created with a deterministic kid, so racing workers agree on one key per slot.
+    """
+
+    def __init__(self, algorithm: str, rotation_hours: int):
+        if algorithm not in ("EdDSA", "RS256"):
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.rotation_seconds = rotation_hours * 3600
+        self.private_keys: Dict[str, Any] = {}
+        self.public_keys: Dict[str, Any] = {}
+        self.jwks: List[dict] = []
+
+    def current_slot(self) -> int:
+        return int(time.time() // self.rotation_seconds)
+
+    def kid_for_slot(self, slot: int) -> str:
+        return f"{self.algorithm.lower()}-{slot}"
+
+    def generate_private_key(self):
+        if self.algorithm == "EdDSA":
+            return ed25519.Ed25519PrivateKey.generate()
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def slot_key_document(self, slot: int) -> dict:
+        """Generate and serialize a fresh key for a rotation slot (CPU-bound, RSA especially)"""
+        private_key = self.generate_private_key()
+        encryption = (serialization.BestAvailableEncryption(JWT_KEY_PASSPHRASE.encode())
+                      if JWT_KEY_PASSPHRASE else serialization.NoEncryption())
+        activates_at = datetime.utcfromtimestamp(slot * self.rotation_seconds)
+        return {
+            "kid": self.kid_for_slot(slot),
+            "alg": self.algorithm,
+            "private_pem": private_key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, encryption
+            ).decode(),
+            "public_pem": private_key.public_key().public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+            ).decode(),
+            "activates_at": activates_at,
+            "expires_at": activates_at + timedelta(seconds=self.rotation_seconds, hours=JWT_EXPIRE_HOURS)
+        }
+
+    async def ensure_slot_key(self, slot: int):
+        """Create the key for a rotation slot unless another worker already has"""
+        if await db.signing_keys.count_documents({"kid": self.kid_for_slot(slot)}, limit=1):
+            return
+        # Generation runs off the event loop; a worker racing us to the same slot loses on the kid index
+        document = await asyncio.to_thread(self.slot_key_document, slot)
+        try:
+            await db.signing_keys.insert_one(document)
+        except DuplicateKeyError:
+            pass
+
+    async def refresh(self):
+        """Make sure the current and next slot keys exist, then reload every unexpired key"""
+        slot = self.current_slot()
+        for upcoming in (slot, slot + 1):
+            if self.kid_for_slot(upcoming) not in self.public_keys:
+                await self.ensure_slot_key(upcoming)
+        
+        private_keys, public_keys, jwks = {}, {}, []
+        cursor = db.signing_keys.find(
+            {"alg": self.algorithm, "expires_at": {"$gt": datetime.utcnow()}}, {"_id": 0}
+        )
+        async for key in cursor:
+            kid = key["kid"]
+            # Parsing PEMs is slow for RSA, so reuse keys that are already loaded
+            public_key = self.public_keys.get(kid) or serialization.load_pem_public_key(key["public_pem"].encode())
+            private_key = self.private_keys.get(kid) or serialization.load_pem_private_key(
+                key["private_pem"].encode(), JWT_KEY_PASSPHRASE.encode() if JWT_KEY_PASSPHRASE else None
+            )
+            public_keys[kid] = public_key
+            private_keys[kid] = private_key
+            jwk = get_default_algorithms()[self.algorithm].to_jwk(public_key, as_dict=True)
+            jwks.append({**jwk, "kid": kid, "alg": self.algorithm, "use": "sig"})
+        self.private_keys, self.public_keys, self.jwks = private_keys, public_keys, jwks
+
+    def sign(self, payload: dict) -> str:
+        kid = self.kid_for_slot(self.current_slot())
+        if kid not in self.private_keys:
+            # The refresh loop has not caught up with the slot boundary yet; use the newest key we hold
+            kid = max(self.private_keys, key=lambda k: int(k.rsplit("-", 1)[1]))
+        return jwt.encode(payload, self.private_keys[kid], algorithm=self.algorithm, headers={"kid": kid})
+
+    def verification_key(self, kid: Optional[str]):
+        return self.public_keys.get(kid)
+
+signing_keys = SigningKeyRing(JWT_ALGORITHM, JWT_KEY_ROTATION_HOURS)
+
+async def ensure_signing_key_indexes():
+    """Create the kid uniqueness and key expiry (TTL) indexes"""
+    await db.signing_keys.create_index("kid", unique=True)
+    await db.signing_keys.create_index("expires_at", expireAfterSeconds=0)
+
 def create_access_token(data: dict) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=JWT_EXPIRE_HOURS)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
-    return encoded_jwt
+    # jti keeps tokens issued in the same second distinct, so revoking one never revokes its twin
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    return signing_keys.sign(to_encode)
 
 def decode_token(token: str) -> dict:
     """Decode and verify a JWT token"""
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        public_key = signing_keys.verification_key(jwt.get_unverified_header(token).get("kid"))
+        if public_key is None:
+            return None
+        payload = jwt.decode(token, public_key, algorithms=[signing_keys.algorithm])
         return payload
     except jwt.PyJWTError:
         return None
 
+def token_fingerprint(token: str) -> str:
+    """Stable hash identifying a token in the principal cache and revocation list"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class PrincipalCache:
+    """LRU cache of resolved users keyed by token fingerprint
+
+    Entries live for at most `ttl_seconds` and never past the token's own `exp`,
+    so a cache hit skips signature verification and the user lookup without
+    extending the lifetime of the token.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user
+
+    def put(self, key: str, user: dict, token_exp: float):
+        expires_at = min(token_exp, time.time() + self.ttl_seconds)
+        self._entries[key] = (user, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        """Drop the entry for a single token (logout, refresh, revocation)"""
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+class RevocationList:
+    """Per-worker mirror of the revoked_tokens collection
+
+    Membership checks are a dict lookup, so get_current_user never waits on Mongo.
+    Workers bulk-load the live set at startup and then poll for revocations made
+    by other workers every REVOCATION_SYNC_SECONDS. Mongo's TTL index drops rows
+    once the token would have expired anyway.
+    """
+
+    # Overlap each sync window to tolerate clock skew between workers
+    SYNC_OVERLAP = timedelta(seconds=30)
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self.synced_at: Optional[datetime] = None
+
+    def __contains__(self, fingerprint: str) -> bool:
+        expires_at = self._revoked.get(fingerprint)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def add(self, fingerprint: str, expires_at: float):
+        self._revoked[fingerprint] = expires_at
+        principal_cache.invalidate(fingerprint)
+
+    def prune(self):
+        now = time.time()
+        for fingerprint in [fp for fp, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[fingerprint]
+
+    async def revoke(self, fingerprint: str, expires_at: float):
+        """Revoke a token on this worker immediately and persist it for the others"""
+        self.add(fingerprint, expires_at)
+        await db.revoked_tokens.update_one(
+            {"fingerprint": fingerprint},
+            {"$setOnInsert": {
+                "fingerprint": fingerprint,
+                "expires_at": datetime.utcfromtimestamp(expires_at),
+                "revoked_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    async def sync(self):
+        """Load revocations newer than the last sync (everything live on first call)"""
+        started_at = datetime.utcnow()
+        query = {"expires_at": {"$gt": started_at}}
+        if self.synced_at:
+            query["revoked_at"] = {"$gte": self.synced_at - self.SYNC_OVERLAP}
+        cursor = db.revoked_tokens.find(query, {"_id": 0, "fingerprint": 1, "expires_at": 1})
+        async for row in cursor.batch_size(STREAM_BATCH_SIZE):
+            self.add(row["fingerprint"], row["expires_at"].replace(tzinfo=timezone.utc).timestamp())
+        self.synced_at = started_at
+        self.prune()
+
+revocation_list = RevocationList()
+
+async def ensure_revocation_indexes():
+    """Create the lookup, sync and TTL indexes on revoked_tokens"""
+    await db.revoked_tokens.create_index("fingerprint", unique=True)
+    await db.revoked_tokens.create_index("revoked_at")
+    await db.revoked_tokens.create_index("expires_at", expireAfterSeconds=0)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get the current authenticated user from JWT token"""
     token = credentials.credentials
+    fingerprint = token_fingerprint(token)
+    if fingerprint in revocation_list:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    
+    user = principal_cache.get(fingerprint)
+    if user:
+        return user
+    
     payload = decode_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -626,96 +1856,142 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token")
         
-    # Get user from mock data for now
-    user = get_mock_user_by_email(email)
+    user = await get_user_by_email(email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    principal_cache.put(fingerprint, user, payload["exp"])
     return user
 
-def get_mock_user_by_email(email: str) -> Optional[dict]:
-    """Get mock user data by email"""
-    mock_users = {
-        'admin@saas.com': {
-            'id': '1',
-            'name': 'John Smith',
-            'email': 'admin@saas.com',
-            'role': 'saas_admin',
-            'roleDisplay': 'SaaS Admin',
-            'avatar': 'https://images.unsplash.com/photo-1472099645785-5658abf4ff4e?w=150&h=150&fit=crop&crop=face',
-            'created_at': datetime.utcnow()
-        },
-        'superadmin@tenant1.com': {
-            'id': '2',
-            'name': 'Sarah Johnson',
-            'email': 'superadmin@tenant1.com',
-            'role': 'super_admin',
-            'roleDisplay': 'Super Admin',
-            'tenant': 'QuickMart',
-            'avatar': 'https://images.unsplash.com/photo-1494790108755-2616b612b47c?w=150&h=150&fit=crop&crop=face',
-            'created_at': datetime.utcnow()
-        },
-        'manager@store1.com': {
-            'id': '3',
-            'name': 'Mike Davis',
-            'email': 'manager@store1.com',
-            'role': 'store_manager',
-            'roleDisplay': 'Store Manager',
-            'store': 'Downtown QuickMart',
-            'avatar': 'https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=150&h=150&fit=crop&crop=face',
-            'created_at': datetime.utcnow()
-        },
-        'vendor@foodie.com': {
-            'id': '4',
-            'name': 'Lisa Chen',
-            'email': 'vendor@foodie.com',
-            'role': 'vendor',
-            'roleDisplay': 'Vendor',
-            'business': 'Foodie Express',
-            'avatar': 'https://images.unsplash.com/photo-1438761681033-6461ffad8d80?w=150&h=150&fit=crop&crop=face',
-            'created_at': datetime.utcnow()
-        },
-        'delivery@fast.com': {
-            'id': '5',
-            'name': 'Carlos Rodriguez',
-            'email': 'delivery@fast.com',
-            'role': 'delivery_partner',
-            'roleDisplay': 'Delivery Partner',
-            'avatar': 'https://images.unsplash.com/photo-1500648767791-00dcc994a43e?w=150&h=150&fit=crop&crop=face',
-            'created_at': datetime.utcnow()
-        },
-        'customer@email.com': {
-            'id': '6',
-            'name': 'Emma Wilson',
-            'email': 'customer@email.com',
-            'role': 'customer',
-            'roleDisplay': 'Customer',
-            'avatar': 'https://images.unsplash.com/photo-1544005313-94ddf0286df2?w=150&h=150&fit=crop&crop=face',
-            'created_at': datetime.utcnow()
-        },
-        'support@help.com': {
-            'id': '7',
-            'name': 'David Kim',
-            'email': 'support@help.com',
-            'role': 'support_staff',
-            'roleDisplay': 'Support Staff',
-            'avatar': 'https://images.unsplash.com/photo-1519244703995-f4e0f30006d5?w=150&h=150&fit=crop&crop=face',
-            'created_at': datetime.utcnow()
-        }
+# User registry
+ROLE_DISPLAY_NAMES = {
+    'saas_admin': 'SaaS Admin',
+    'super_admin': 'Super Admin',
+    'store_manager': 'Store Manager',
+    'vendor': 'Vendor',
+    'delivery_partner': 'Delivery Partner',
+    'customer': 'Customer',
+    'support_staff': 'Support Staff'
+}
+
+DEMO_USERS = [
+    {
+        'id': '1',
+        'name': 'John Smith',
+        'email': 'admin@saas.com',
+        'role': 'saas_admin',
+        'roleDisplay': 'SaaS Admin',
+        'avatar': 'https://images.unsplash.com/photo-1472099645785-5658abf4ff4e?w=150&h=150&fit=crop&crop=face'
+    },
+    {
+        'id': '2',
+        'name': 'Sarah Johnson',
+        'email': 'superadmin@tenant1.com',
+        'role': 'super_admin',
+        'roleDisplay': 'Super Admin',
+        'tenant': 'QuickMart',
+        'avatar': 'https://images.unsplash.com/photo-1494790108755-2616b612b47c?w=150&h=150&fit=crop&crop=face'
+    },
+    {
+        'id': '3',
+        'name': 'Mike Davis',
+        'email': 'manager@store1.com',
+        'role': 'store_manager',
+        'roleDisplay': 'Store Manager',
+        'store': 'Downtown QuickMart',
+        'outlet_id': 'out_001',
+        'avatar': 'https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=150&h=150&fit=crop&crop=face'
+    },
+    {
+        'id': '4',
+        'name': 'Lisa Chen',
+        'email': 'vendor@foodie.com',
+        'role': 'vendor',
+        'roleDisplay': 'Vendor',
+        'business': 'Foodie Express',
+        'avatar': 'https://images.unsplash.com/photo-1438761681033-6461ffad8d80?w=150&h=150&fit=crop&crop=face'
+    },
+    {
+        'id': '5',
+        'name': 'Carlos Rodriguez',
+        'email': 'delivery@fast.com',
+        'role': 'delivery_partner',
+        'roleDisplay': 'Delivery Partner',
+        'avatar': 'https://images.unsplash.com/photo-1500648767791-00dcc994a43e?w=150&h=150&fit=crop&crop=face'
+    },
+    {
+        'id': '6',
+        'name': 'Emma Wilson',
+        'email': 'customer@email.com',
+        'role': 'customer',
+        'roleDisplay': 'Customer',
+        'avatar': 'https://images.unsplash.com/photo-1544005313-94ddf0286df2?w=150&h=150&fit=crop&crop=face'
+    },
+    {
+        'id': '7',
+        'name': 'David Kim',
+        'email': 'support@help.com',
+        'role': 'support_staff',
+        'roleDisplay': 'Support Staff',
+        'avatar': 'https://images.unsplash.com/photo-1519244703995-f4e0f30006d5?w=150&h=150&fit=crop&crop=face'
     }
-    return mock_users.get(email)
+]
+
+# Login reads the profile and the password hash in one round trip through the email index
+USER_CREDENTIAL_PROJECTION = {"_id": 0, "email_normalized": 0}
+USER_PROFILE_PROJECTION = {"_id": 0, "password_hash": 0, "email_normalized": 0}
+# Covering login index of earlier releases; login no longer reads through it
+LEGACY_USER_CREDENTIAL_INDEX = "email_normalized_1_id_1_password_hash_1"
+
+def normalize_email(email: str) -> str:
+    """Canonical form used for the unique email index"""
+    return email.strip().lower()
+
+async def ensure_user_indexes():
+    """Create the unique email/id indexes (and drop the old covering login index)"""
+    await db.users.create_index("email_normalized", unique=True)
+    await db.users.create_index("id", unique=True)
+    if LEGACY_USER_CREDENTIAL_INDEX in await db.users.index_information():
+        await db.users.drop_index(LEGACY_USER_CREDENTIAL_INDEX)
+
+# Demo user fields that are kept current on existing accounts, not just set on insert
+DEMO_USER_ASSIGNMENTS = ("outlet_id",)
+
+async def seed_demo_users():
+    """Insert the demo accounts (password123) if they are missing"""
+    password_hash = await hash_password(DEMO_PASSWORD)
+    await db.users.bulk_write([
+        UpdateOne(
+            {"email_normalized": normalize_email(user["email"])},
+            {
+                "$setOnInsert": {
+                    **{name: value for name, value in user.items() if name not in DEMO_USER_ASSIGNMENTS},
+                    "email_normalized": normalize_email(user["email"]),
+                    "password_hash": password_hash,
+                    "created_at": datetime.utcnow()
+                },
+                "$set": {name: user[name] for name in DEMO_USER_ASSIGNMENTS if name in user},
+            },
+            upsert=True
+        )
+        for user in DEMO_USERS
+    ], ordered=False)
+
+async def get_user_credentials(email: str) -> Optional[dict]:
+    """Fetch a user's profile together with the password hash, for login only"""
+    return await db.users.find_one({"email_normalized": normalize_email(email)}, USER_CREDENTIAL_PROJECTION)
+
+async def get_user_by_email(email: str) -> Optional[dict]:
+    """Fetch a user's profile (never the password hash) by email"""
+    return await db.users.find_one({"email_normalized": normalize_email(email)}, USER_PROFILE_PROJECTION)
 
 # Authentication API Endpoints
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(user_login: UserLogin):
     """Authenticate user and return JWT token"""
-    user_data = get_mock_user_by_email(user_login.email)
+    user_data = await get_user_credentials(user_login.email)
     
-    if not user_data:
-        raise HTTPException(status_code=401, detail="Invalid email or password")
-    
-    # For demo purposes, accept password123 for all users
-    if user_login.password != "password123":
+    if not user_data or not await verify_password(user_login.password, user_data.pop("password_hash")):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Create access token
@@ -743,20 +2019,33 @@ async def login(user_login: UserLogin):
 
 @api_router.post("/auth/register", response_model=dict)
 async def register(user_create: UserCreate):
-    """Register a new user"""
-    # Check if user already exists
-    if get_mock_user_by_email(user_create.email):
+    """Register a new customer account"""
+    if user_create.role != "customer":
+        raise HTTPException(status_code=400, detail="Only customer accounts can self-register")
+    
+    user = {
+        "id": str(uuid.uuid4()),
+        "name": user_create.name,
+        "email": user_create.email.strip(),
+        "email_normalized": normalize_email(user_create.email),
+        "password_hash": await hash_password(user_create.password),
+        "role": user_create.role,
+        "roleDisplay": ROLE_DISPLAY_NAMES[user_create.role],
+        "phone": user_create.phone,
+        "created_at": datetime.utcnow()
+    }
+    try:
+        await db.users.insert_one(user)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # For demo purposes, just return success message
-    # In real app, would hash password and save to database
     return {
         "message": "User registered successfully",
         "user": {
-            "id": str(uuid.uuid4()),
-            "name": user_create.name,
-            "email": user_create.email,
-            "role": user_create.role
+            "id": user["id"],
+            "name": user["name"],
+            "email": user["email"],
+            "role": user["role"]
         }
     }
 
@@ -777,16 +2066,37 @@ async def get_profile(current_user: dict = Depends(get_current_user)):
     )
 
 @api_router.post("/auth/logout")
-async def logout():
-    """Logout user (token-based, so just return success)"""
+async def logout(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Logout user and revoke the presented token"""
+    if credentials:
+        payload = decode_token(credentials.credentials)
+        if payload:
+            await revocation_list.revoke(token_fingerprint(credentials.credentials), payload["exp"])
     return {"message": "Successfully logged out"}
 
 @api_router.post("/auth/refresh")
-async def refresh_token(current_user: dict = Depends(get_current_user)):
+async def refresh_token(
+    current_user: dict = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
     """Refresh JWT token"""
+    principal_cache.invalidate(token_fingerprint(credentials.credentials))
     token = create_access_token(data={"sub": current_user["email"], "role": current_user["role"]})
     return {"token": token, "message": "Token refreshed successfully"}
 
+@api_router.get("/auth/jwks")
+async def get_jwks(response: Response):
+    """Public keys for verifying access tokens, keyed by kid"""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return {"keys": signing_keys.jwks}
+
+@api_router.get("/auth/principal-cache/stats")
+async def get_principal_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Get hit/miss counters for this worker's principal cache"""
+    if current_user["role"] != "saas_admin":
+        raise HTTPException(status_code=403, detail="Access denied: SaaS Admin role required")
+    return principal_cache.stats()
+
 @api_router.post("/auth/forgot-password")
 async def forgot_password(email_data: dict):
     """Initiate password reset (mock implementation)"""
@@ -838,12 +2148,14 @@ async def get_store_manager_dashboard(current_user: dict = Depends(get_current_u
     if current_user["role"] != "store_manager":
         raise HTTPException(status_code=403, detail="Access denied: Store Manager role required")
     
+    alerts = await low_stock_alerts(current_user.get("outlet_id"))
     return {
         "dashboard": "store_manager",
         "user": current_user,
         "data": {
             "store_sales": 12345.67,
-            "inventory_alerts": 8,
+            "inventory_alerts": alerts["count"],
+            "low_stock_products": alerts["products"],
             "staff_count": 15,
             "daily_visitors": 234
         }
@@ -918,90 +2230,1430 @@ async def get_support_staff_dashboard(current_user: dict = Depends(get_current_u
     }
 
 
+# Catalog collections
+# Business users, outlets and products are polled constantly by kiosks and admin screens.
+# Every write bumps a per-collection counter in collection_versions, and list reads
+# answer If-None-Match from that single document without touching the list itself.
+CATALOG_LIST_SORT = [("created_at", ASCENDING), ("id", ASCENDING)]
+
+async def ensure_catalog_indexes():
+    """Create the id lookups and listing-order indexes for catalog collections"""
+    for collection in ("business_users", "outlets", "products"):
+        await db[collection].create_index("id", unique=True)
+        await db[collection].create_index(CATALOG_LIST_SORT)
+
+async def seed_catalog():
+    """Insert the demo users, outlets and products if they are missing"""
+    for collection, records in (
+        ("business_users", generate_mock_business_users()),
+        ("outlets", generate_mock_outlets()),
+        ("products", generate_mock_products()),
+    ):
+        result = await db[collection].bulk_write([
+            UpdateOne({"id": record.id}, {"$setOnInsert": catalog_document(collection, record)}, upsert=True)
+            for record in records
+        ], ordered=False)
+        if result.upserted_count:
+            await bump_collection_version(collection)
+
+async def bump_collection_version(collection: str):
+    """Invalidate every ETag handed out for `collection`; call after the write lands"""
+    await db.collection_versions.update_one(
+        {"_id": collection},
+        {"$inc": {"version": 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex}},
+        upsert=True
+    )
+
+async def collection_etag(collection: str) -> str:
+    """Weak ETag for the current contents of `collection`
+
+    It names a version of the contents, not the bytes of one encoding, so compressed
+    and identity responses carry the same tag and the 304 path repeats it unchanged.
+
+    The epoch is random per version document, so a dropped and reseeded
+    database never reissues a tag a client may still hold.
+    """
+    version = await db.collection_versions.find_one({"_id": collection})
+    if version is None:
+        version = await db.collection_versions.find_one_and_update(
+            {"_id": collection},
+            {"$setOnInsert": {"version": 0, "epoch": uuid.uuid4().hex}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    return f'W/"{version["epoch"]}-{version["version"]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored on both sides"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+async def list_catalog(collection: str, serializer: ListSerializer, if_none_match: Optional[str]) -> Response:
+    """Full listing of a catalog collection, or a bare 304 if the client's copy is current"""
+    etag = await collection_etag(collection)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    documents = await db[collection].find({}, serializer.projection).sort(CATALOG_LIST_SORT).to_list(None)
+    return serializer.documents(documents, headers)
+
+def catalog_document(collection: str, record: BaseModel) -> dict:
+    """A record as stored: the model's fields plus the bookkeeping fields kept beside them"""
+    document = {**record.dict(), "updated_at": datetime.utcnow()}
+    if collection == "products":
+        document["low_stock"] = document["inventory_count"] < document["min_stock_level"]
+    return document
+
+async def insert_catalog_record(collection: str, record: BaseModel) -> dict:
+    document = catalog_document(collection, record)
+    await db[collection].insert_one(document)
+    await bump_collection_version(collection)
+    document.pop("_id")
+    return document
+
+async def replace_catalog_record(collection: str, record_id: str, record: BaseModel, not_found: str,
+                                 managed_fields: frozenset = frozenset(), derived_fields: Optional[dict] = None):
+    """Replace a catalog document by id, keeping its original created_at and `managed_fields`
+
+    `derived_fields` are aggregation expressions evaluated after the replacement, for
+    fields that depend on both the new values and the managed ones.
+    """
+    update = {**record.dict(exclude={"id", "created_at", *managed_fields}), "updated_at": datetime.utcnow()}
+    if derived_fields:
+        # Pipeline $set would read "$..." strings as field paths, so values go in as literals
+        update = [{"$set": {name: {"$literal": value} for name, value in update.items()}}, {"$set": derived_fields}]
+    else:
+        update = {"$set": update}
+    existing = await db[collection].find_one_and_update(
+        {"id": record_id},
+        update,
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if existing is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    await bump_collection_version(collection)
+    return existing
+
+async def delete_catalog_record(collection: str, record_id: str) -> bool:
+    result = await db[collection].delete_one({"id": record_id})
+    if result.deleted_count:
+        await bump_collection_version(collection)
+    return bool(result.deleted_count)
+
 # Super Admin User Management APIs
 @api_router.get("/super-admin/users", response_model=List[BusinessUser])
-async def get_business_users():
+async def get_business_users(if_none_match: Optional[str] = Header(None)):
     """Get all business users for Super Admin"""
-    return generate_mock_business_users()
+    return await list_catalog("business_users", BUSINESS_USER_LIST, if_none_match)
 
 @api_router.post("/super-admin/users", response_model=BusinessUser)
 async def create_business_user(user: BusinessUser):
     """Create a new business user"""
-    # Mock creation - in real app would save to database
     user.id = str(uuid.uuid4())
     user.created_at = datetime.utcnow()
+    await insert_catalog_record("business_users", user)
     return user
 
 @api_router.put("/super-admin/users/{user_id}", response_model=BusinessUser)
 async def update_business_user(user_id: str, user_data: BusinessUser):
     """Update a business user"""
-    user_data.id = user_id
-    return user_data
+    return await replace_catalog_record("business_users", user_id, user_data, "User not found")
 
 @api_router.delete("/super-admin/users/{user_id}")
 async def delete_business_user(user_id: str):
     """Delete a business user"""
+    await delete_catalog_record("business_users", user_id)
     return {"message": f"User {user_id} deleted successfully"}
 
 # Outlet Management APIs
 @api_router.get("/super-admin/outlets", response_model=List[BusinessOutlet])
-async def get_outlets():
+async def get_outlets(if_none_match: Optional[str] = Header(None)):
     """Get all business outlets"""
-    return generate_mock_outlets()
+    return await list_catalog("outlets", OUTLET_LIST, if_none_match)
 
 @api_router.post("/super-admin/outlets", response_model=BusinessOutlet)
 async def create_outlet(outlet: BusinessOutlet):
     """Create a new outlet"""
     outlet.id = str(uuid.uuid4())
     outlet.created_at = datetime.utcnow()
+    await insert_catalog_record("outlets", outlet)
     return outlet
 
 @api_router.put("/super-admin/outlets/{outlet_id}", response_model=BusinessOutlet)
 async def update_outlet(outlet_id: str, outlet_data: BusinessOutlet):
     """Update an outlet"""
-    outlet_data.id = outlet_id
-    return outlet_data
+    return await replace_catalog_record("outlets", outlet_id, outlet_data, "Outlet not found")
 
 # Product Management APIs  
+# Stock only moves through reservations and inventory adjustments, never a product edit
+PRODUCT_MANAGED_FIELDS = frozenset({"inventory_count"})
+# low_stock is stored beside the stock it describes and rewritten by every update that
+# moves inventory_count or min_stock_level, so a partial index over low_stock: true
+# holds exactly the products needing a reorder
+LOW_STOCK_EXPRESSION = {"$lt": ["$inventory_count", "$min_stock_level"]}
+PRODUCT_DERIVED_FIELDS = {"low_stock": LOW_STOCK_EXPRESSION}
+LOW_STOCK_ALERT_LIMIT = 100
+LOW_STOCK_ALERT_PROJECTION = {"_id": 0, "id": 1, "name": 1, "sku": 1, "inventory_count": 1, "min_stock_level": 1}
+
+def stock_change(delta: int) -> list:
+    """Update pipeline that moves inventory_count by `delta` and re-derives low_stock"""
+    return [
+        {"$set": {"inventory_count": {"$add": ["$inventory_count", delta]}, "updated_at": datetime.utcnow()}},
+        {"$set": PRODUCT_DERIVED_FIELDS},
+    ]
+
+async def low_stock_alerts(outlet_id: Optional[str]) -> dict:
+    """Count and most urgent products below min_stock_level at an outlet, read from the partial index"""
+    if not outlet_id:
+        return {"count": 0, "products": []}
+    query = {"low_stock": True, "outlet_ids": outlet_id}
+    count, products = await asyncio.gather(
+        db.products.count_documents(query),
+        db.products.find(query, LOW_STOCK_ALERT_PROJECTION)
+            .sort("inventory_count", ASCENDING).limit(LOW_STOCK_ALERT_LIMIT).to_list(LOW_STOCK_ALERT_LIMIT)
+    )
+    return {"count": count, "products": products}
+
+async def backfill_low_stock() -> int:
+    """Derive low_stock for every product (documents written before it existed)"""
+    result = await db.products.update_many({}, [{"$set": PRODUCT_DERIVED_FIELDS}])
+    return result.modified_count
+
 @api_router.get("/super-admin/products", response_model=List[Product])
-async def get_products():
+async def get_products(if_none_match: Optional[str] = Header(None)):
     """Get all products"""
-    return generate_mock_products()
+    return await list_catalog("products", PRODUCT_LIST, if_none_match)
 
 @api_router.post("/super-admin/products", response_model=Product)
 async def create_product(product: Product):
     """Create a new product"""
     product.id = str(uuid.uuid4())
     product.created_at = datetime.utcnow()
+    try:
+        product_indexes.index_product(await insert_catalog_record("products", product))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="SKU or barcode already in use")
     return product
 
 @api_router.put("/super-admin/products/{product_id}", response_model=Product)
 async def update_product(product_id: str, product_data: Product):
     """Update a product"""
-    product_data.id = product_id
-    return product_data
+    try:
+        product = await replace_catalog_record(
+            "products", product_id, product_data, "Product not found", PRODUCT_MANAGED_FIELDS, PRODUCT_DERIVED_FIELDS
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="SKU or barcode already in use")
+    product_indexes.index_product(product)
+    return product
 
 @api_router.delete("/super-admin/products/{product_id}")
 async def delete_product(product_id: str):
     """Delete a product"""
+    if await delete_catalog_record("products", product_id):
+        await db.product_deletions.insert_one({"id": product_id, "deleted_at": datetime.utcnow()})
+        product_indexes.remove_product(product_id)
     return {"message": f"Product {product_id} deleted successfully"}
 
+# Product search
+# Each worker keeps an inverted index over the catalog. Postings are compact arrays of
+# (docid << 4 | field mask) scanned with numpy; a sorted vocabulary gives prefix ranges via
+# bisect, and a deletion neighbourhood of name/category terms gives one-edit typo
+# tolerance without scanning the vocabulary. ProductIndexes keeps it current.
+PRODUCT_SEARCH_FIELDS = ("name", "sku", "category", "description")  # position = field code
+PRODUCT_SEARCH_FIELD_WEIGHTS = (3, 4, 2, 1)
+# Best field weight for each 4-bit mask of fields a term occurs in
+PRODUCT_SEARCH_MASK_WEIGHTS = np.array(
+    [max((weight for field, weight in enumerate(PRODUCT_SEARCH_FIELD_WEIGHTS) if mask >> field & 1), default=0)
+     for mask in range(16)], dtype=np.uint8)
+PRODUCT_SEARCH_TYPO_FIELDS = 0b0101  # name, category
+# A match scores best field weight x quality
+PRODUCT_SEARCH_EXACT_QUALITY = 5
+PRODUCT_SEARCH_PREFIX_QUALITY = 4
+PRODUCT_SEARCH_TYPO_QUALITY = 3
+PRODUCT_SEARCH_FUZZY_PREFIX_QUALITY = 2
+PRODUCT_SEARCH_MIN_TYPO_LENGTH = 4
+# Short prefixes match thousands of terms; only the most common ones are expanded
+PRODUCT_SEARCH_MAX_EXPANSIONS = 64
+PRODUCT_SEARCH_MAX_EXPANDED_POSTINGS = 100_000
+# New terms wait in a small sorted buffer and are merged into the vocabulary in batches
+PRODUCT_SEARCH_TERM_BUFFER = 4096
+# Terms in at least this many products are also kept in a short sorted list, so wide
+# prefix ranges ("s", "sku") can be ranked without counting every term in them
+PRODUCT_SEARCH_FREQUENT_TERM_POSTINGS = 32
+PRODUCT_SEARCH_MAX_LIMIT = 50
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+")
+SEARCH_EDIT_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+def search_tokens(text: Optional[str]) -> List[str]:
+    return SEARCH_TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+def deletion_variants(term: str) -> set:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def single_edits(term: str) -> set:
+    """Every string one insert, delete, substitution or transposition away from `term`"""
+    splits = [(term[:i], term[i:]) for i in range(len(term) + 1)]
+    return (
+        {left + right[1:] for left, right in splits if right}
+        | {left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1}
+        | {left + char + right[1:] for left, right in splits if right for char in SEARCH_EDIT_ALPHABET}
+        | {left + char + right for left, right in splits for char in SEARCH_EDIT_ALPHABET}
+    ) - {term}
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Damerau-Levenshtein distance <= 1 (one insert, delete, substitution or transposition)"""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:])
+
+def prefix_range(terms: List[str], prefix: str) -> tuple:
+    start = bisect_left(terms, prefix)
+    return start, bisect_left(terms, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+
+class ProductSearchIndex:
+    """Inverted index over PRODUCT_SEARCH_FIELDS with prefix, typo and outlet filtering
+
+    Docids only grow: a re-indexed product gets a fresh docid and the old one is marked
+    dead, so postings stay sorted by docid and appends stay O(1). Once dead docids
+    outnumber live ones, `compact` renumbers the live products.
+    """
+
+    def __init__(self):
+        self.product_ids: List[Optional[str]] = []
+        self.docids: Dict[str, int] = {}
+        self.versions: Dict[str, Any] = {}
+        self.alive = bytearray()
+        self.dead = 0
+        self.postings: Dict[str, array] = {}
+        self.vocabulary: List[str] = []
+        self.new_terms: List[str] = []
+        self.bulk_loading = False
+        self.frequent_terms: List[str] = []
+        self.typo_terms: set = set()
+        self.typo_variants: Dict[str, Any] = {}
+        self.outlet_docids: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.docids)
+
+    def index_product(self, product: dict):
+        product_id = product["id"]
+        # Stock and price changes touch updated_at too; only re-index when searchable content moved
+        version = (product.get("status"), tuple(product.get("outlet_ids") or ()),
+                   *(product.get(name) for name in PRODUCT_SEARCH_FIELDS))
+        if self.versions.get(product_id) == version:
+            return
+        self.remove_product(product_id)
+        self.versions[product_id] = version
+        if product.get("status") == "inactive":
+            return
+
+        docid = len(self.product_ids)
+        self.product_ids.append(product_id)
+        self.alive.append(1)
+        self.docids[product_id] = docid
+        fields: Dict[str, int] = {}
+        for field, name in enumerate(PRODUCT_SEARCH_FIELDS):
+            terms = search_tokens(product.get(name))
+            if name == "sku" and terms:
+                # Whole SKU without separators, so a scanned or typed "orgapl001" matches too
+                terms.append("".join(terms))
+            for term in terms:
+                fields[term] = fields.get(term, 0) | 1 << field
+        for term, mask in fields.items():
+            self.add_posting(term, docid << 4 | mask, bool(mask & PRODUCT_SEARCH_TYPO_FIELDS))
+        for outlet_id in set(product.get("outlet_ids") or []):
+            outlet = self.outlet_docids.get(outlet_id)
+            if outlet is None:
+                outlet = self.outlet_docids[outlet_id] = array("I")
+            outlet.append(docid)
+
+    def add_posting(self, term: str, posting: int, typo_tolerant: bool):
+        postings = self.postings.get(term)
+        if postings is None:
+            postings = self.postings[term] = array("I")
+            self.add_term(term)
+        postings.append(posting)
+        if len(postings) == PRODUCT_SEARCH_FREQUENT_TERM_POSTINGS:
+            insort(self.frequent_terms, term)
+        # A four-letter query can be a three-letter term plus one inserted character
+        if typo_tolerant and term not in self.typo_terms and len(term) >= PRODUCT_SEARCH_MIN_TYPO_LENGTH - 1:
+            self.typo_terms.add(term)
+            self.add_typo_variants(term)
+
+    def add_term(self, term: str):
+        if self.bulk_loading:
+            self.vocabulary.append(term)
+            return
+        insort(self.new_terms, term)
+        if len(self.new_terms) >= PRODUCT_SEARCH_TERM_BUFFER:
+            # Both lists are sorted, so this is a linear merge of two runs
+            self.vocabulary = sorted(self.vocabulary + self.new_terms)
+            self.new_terms = []
+
+    def add_typo_variants(self, term: str):
+        # Most variants map to a single term, so a bare string is stored until a second one shows up
+        for variant in deletion_variants(term) | {term}:
+            terms = self.typo_variants.get(variant)
+            if terms is None:
+                self.typo_variants[variant] = term
+            elif isinstance(terms, set):
+                terms.add(term)
+            else:
+                self.typo_variants[variant] = {terms, term}
+
+    @contextmanager
+    def bulk_load(self):
+        """Index many products at once, sorting the vocabulary a single time at the end"""
+        self.bulk_loading = True
+        try:
+            yield self
+        finally:
+            self.bulk_loading = False
+            self.vocabulary = sorted(self.vocabulary + self.new_terms)
+            self.new_terms = []
+
+    def remove_product(self, product_id: str):
+        docid = self.docids.pop(product_id, None)
+        self.versions.pop(product_id, None)
+        if docid is None:
+            return
+        self.alive[docid] = 0
+        self.product_ids[docid] = None
+        self.dead += 1
+        if self.dead > max(len(self.docids), 10_000):
+            self.compact()
+
+    def compact(self):
+        """Renumber live products densely, dropping dead postings and unused terms"""
+        alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+        # Renumbering is monotonic, so postings stay sorted by docid
+        renumbered = (np.cumsum(alive) - 1).astype(np.uint32)
+        for term in list(self.postings):
+            postings = np.frombuffer(self.postings[term], dtype=np.uint32)
+            live = postings[alive[postings >> 4]]
+            if len(live):
+                self.postings[term] = array("I", (renumbered[live >> 4] << 4 | live & 15).tobytes())
+            else:
+                del self.postings[term]
+        for outlet_id in list(self.outlet_docids):
+            docids = np.frombuffer(self.outlet_docids[outlet_id], dtype=np.uint32)
+            self.outlet_docids[outlet_id] = array("I", renumbered[docids[alive[docids]]].tobytes())
+        self.product_ids = [product_id for product_id in self.product_ids if product_id is not None]
+        self.docids = {product_id: docid for docid, product_id in enumerate(self.product_ids)}
+        self.alive = bytearray(b"\x01" * len(self.product_ids))
+        self.vocabulary = sorted(self.postings)
+        self.new_terms = []
+        self.frequent_terms = [term for term in self.vocabulary
+                               if len(self.postings[term]) >= PRODUCT_SEARCH_FREQUENT_TERM_POSTINGS]
+        self.typo_terms &= self.postings.keys()
+        self.typo_variants = {}
+        for term in self.typo_terms:
+            self.add_typo_variants(term)
+        self.dead = 0
+
+    def expansions(self, token: str, prefix: bool) -> List[tuple]:
+        """(term, match quality) pairs a query token stands for"""
+        matches = [(token, PRODUCT_SEARCH_EXACT_QUALITY)] if token in self.postings else []
+        if prefix:
+            completions = self.completions(token)
+            matches.extend((term, PRODUCT_SEARCH_PREFIX_QUALITY) for term in completions)
+            if not matches and len(token) >= PRODUCT_SEARCH_MIN_TYPO_LENGTH:
+                # Nothing starts with what was typed: assume a typo and complete its one-edit variants
+                fuzzy = {term for variant in single_edits(token) for term in self.completions(variant)}
+                matches.extend((term, PRODUCT_SEARCH_FUZZY_PREFIX_QUALITY) for term in self.most_common(fuzzy))
+        if len(token) >= PRODUCT_SEARCH_MIN_TYPO_LENGTH:
+            candidates = set()
+            for variant in deletion_variants(token) | {token}:
+                terms = self.typo_variants.get(variant)
+                if isinstance(terms, set):
+                    candidates.update(terms)
+                elif terms is not None:
+                    candidates.add(terms)
+            candidates.discard(token)
+            matches.extend((term, PRODUCT_SEARCH_TYPO_QUALITY) for term in candidates
+                           if term in self.postings and within_one_edit(token, term))
+        return matches
+
+    def completions(self, prefix: str) -> List[str]:
+        """The most common terms that extend `prefix` (excluding `prefix` itself)"""
+        start, end = prefix_range(self.vocabulary, prefix)
+        if end - start > PRODUCT_SEARCH_MAX_EXPANSIONS * 16:
+            # Too wide to count: the frequent terms, topped up in alphabetical order
+            low, high = prefix_range(self.frequent_terms, prefix)
+            terms = self.frequent_terms[low:high] + self.vocabulary[start:start + PRODUCT_SEARCH_MAX_EXPANSIONS]
+        else:
+            terms = self.vocabulary[start:end]
+        if self.new_terms:
+            low, high = prefix_range(self.new_terms, prefix)
+            terms += self.new_terms[low:high]
+        return self.most_common(term for term in dict.fromkeys(terms) if term != prefix)
+
+    def most_common(self, terms) -> List[str]:
+        terms = list(terms)
+        if len(terms) <= PRODUCT_SEARCH_MAX_EXPANSIONS:
+            return terms
+        return heapq.nlargest(PRODUCT_SEARCH_MAX_EXPANSIONS, terms, key=lambda term: len(self.postings[term]))
+
+    def token_postings(self, token: str, prefix: bool) -> List[tuple]:
+        """(postings, quality) for each term a token expands to, within the postings budget"""
+        expansions, total = [], 0
+        for term, quality in self.expansions(token, prefix):
+            postings = np.frombuffer(self.postings[term], dtype=np.uint32)
+            if total and total + len(postings) > PRODUCT_SEARCH_MAX_EXPANDED_POSTINGS:
+                continue
+            total += len(postings)
+            expansions.append((postings, quality))
+        return expansions
+
+    def match(self, expansions: List[tuple]) -> tuple:
+        """Sorted uint32 docids in any of the expansions and each one's best field-weighted score"""
+        if len(expansions) == 1:
+            postings, quality = expansions[0]
+            return postings >> 4, np.take(PRODUCT_SEARCH_MASK_WEIGHTS, postings & 15) * np.uint8(quality)
+        scores = self.match_dense(expansions)
+        docids = np.flatnonzero(scores).astype(np.uint32)
+        return docids, scores[docids]
+
+    def match_dense(self, expansions: List[tuple]) -> np.ndarray:
+        """Best field-weighted score of every docid across the expansions, 0 where none matches"""
+        scores = np.zeros(len(self.product_ids), dtype=np.uint8)
+        for postings, quality in expansions:
+            docids = postings >> 4
+            matched = np.take(PRODUCT_SEARCH_MASK_WEIGHTS, postings & 15) * np.uint8(quality)
+            # Each term lists a docid at most once, so a scatter merges terms without sorting
+            scores[docids] = np.maximum(scores[docids], matched) if len(expansions) > 1 else matched
+        return scores
+
+    def probe(self, expansions: List[tuple], docids: np.ndarray) -> np.ndarray:
+        """Best score of each candidate docid across the expansions, 0 where none matches"""
+        scores = np.zeros(len(docids), dtype=np.uint8)
+        keys = docids << 4
+        for postings, quality in expansions:
+            positions = np.minimum(np.searchsorted(postings, keys), len(postings) - 1)
+            found = postings[positions]
+            matched = np.take(PRODUCT_SEARCH_MASK_WEIGHTS, found & 15) * np.uint8(quality)
+            np.maximum(scores, np.where(found >> 4 == docids, matched, 0), out=scores)
+        return scores
+
+    def search(self, query: str, outlet_id: Optional[str] = None, limit: int = 10) -> List[str]:
+        """Product ids matching every query token, best first; the last token may be a prefix
+
+        Tokens are applied from the fewest postings to the most. Once the candidates are
+        few, later tokens are checked by binary search in their postings instead of being
+        expanded into full match lists.
+        """
+        *words, last = search_tokens(query) or [""]
+        if not last:
+            return []
+        # A repeated word narrows nothing
+        tokens = [self.token_postings(word, prefix=False) for word in dict.fromkeys(words)]
+        tokens.append(self.token_postings(last, prefix=True))
+        sizes = [sum(len(postings) for postings, _ in expansions) for expansions in tokens]
+        tokens = [tokens[i] for i in np.argsort(sizes, kind="stable")]
+        sizes.sort()
+        if not sizes[0]:
+            return []
+
+        outlet = None
+        if outlet_id is not None:
+            outlet = self.outlet_docids.get(outlet_id)
+            if outlet is None:
+                return []
+            outlet = np.frombuffer(outlet, dtype=np.uint32)
+        # Candidates are sparse (docids, scores) while few, and a dense score per docid once
+        # they are a large part of the catalog, where whole-array arithmetic beats gathers
+        documents = len(self.product_ids)
+        dense = None
+        if outlet is not None and len(outlet) < sizes[0]:
+            docids, scores = outlet, np.zeros(len(outlet), dtype=np.uint16)
+            outlet = None
+        elif sizes[0] * 32 < documents:
+            docids, scores = self.match(tokens.pop(0))
+            scores = scores.astype(np.uint16)
+            sizes.pop(0)
+        else:
+            dense = self.match_dense(tokens.pop(0)).astype(np.uint16)
+            sizes.pop(0)
+
+        for expansions, size in zip(tokens, sizes):
+            if dense is None and len(docids) * 32 >= documents:
+                dense = np.zeros(documents, dtype=np.uint16)
+                # Shifted by one so zero-scored candidates stay members; ranking is unaffected
+                dense[docids] = scores + 1
+            if dense is not None:
+                token_scores = self.match_dense(expansions)
+                members = (dense > 0) & (token_scores > 0)
+                dense += token_scores
+                dense *= members
+                continue
+            if not len(docids):
+                return []
+            if len(docids) * len(expansions) * 16 < size:
+                token_scores = self.probe(expansions, docids)
+                found = token_scores > 0
+                docids, scores = docids[found], scores[found] + token_scores[found]
+                continue
+            # Both sides are sorted and unique: probe the larger with the smaller
+            token_docids, token_scores = self.match(expansions)
+            if len(token_docids) < len(docids):
+                docids, scores, token_docids, token_scores = token_docids, token_scores, docids, scores
+            positions = np.minimum(np.searchsorted(token_docids, docids), len(token_docids) - 1)
+            found = token_docids[positions] == docids
+            docids, scores = docids[found], scores[found] + token_scores[positions[found]]
+
+        alive = np.frombuffer(self.alive, dtype=np.uint8)
+        if dense is not None:
+            dense *= alive
+            if outlet is not None:
+                member = np.zeros(documents, dtype=bool)
+                member[outlet] = True
+                dense *= member
+            # Only the docids scoring at least the limit-th best score are worth sorting
+            counts = np.bincount(dense)[:0:-1].cumsum()
+            threshold = len(counts) - min(np.searchsorted(counts, limit), len(counts) - 1)
+            docids = np.flatnonzero(dense >= threshold).astype(np.uint32)
+            scores = dense[docids]
+        else:
+            keep = alive[docids].view(bool)
+            if outlet is not None:
+                keep = keep & np.isin(docids, outlet)
+            docids, scores = docids[keep], scores[keep]
+        # Best score first, then the earliest indexed product
+        ranks = docids.astype(np.int64) - (scores.astype(np.int64) << 32)
+        if len(ranks) > limit:
+            ranks = ranks[np.argpartition(ranks, limit)[:limit]]
+        ranks.sort()
+        return [self.product_ids[rank & 0xFFFFFFFF] for rank in ranks.tolist()]
+
+product_search = ProductSearchIndex()
+
+@api_router.get("/products/search", response_model=List[Product])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    outlet_id: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=PRODUCT_SEARCH_MAX_LIMIT)
+):
+    """Search products by name, SKU, category and description, best match first
+
+    The last word is treated as a prefix for autocomplete, and words of four or more
+    letters also match names and categories one typo away.
+    """
+    product_ids = product_search.search(q, outlet_id, limit)
+    if not product_ids:
+        return PRODUCT_LIST.documents([])
+    products = await db.products.find({"id": {"$in": product_ids}}, PRODUCT_LIST.projection).to_list(len(product_ids))
+    by_id = {product["id"]: product for product in products}
+    return PRODUCT_LIST.documents([by_id[product_id] for product_id in product_ids if product_id in by_id])
+
+# Barcode and SKU lookup
+# Kiosk scans resolve from a per-worker map of code -> product JSON, so a hit costs two
+# dict lookups and no database round trip. A miss (a product another worker wrote since
+# the last sync, or an unknown code) falls through to the unique sku/barcode indexes.
+class ProductCodeIndex:
+    """Rendered product JSON, reachable by barcode and by SKU"""
+
+    def __init__(self):
+        self.products: Dict[str, tuple] = {}  # product id -> (barcode, sku, JSON)
+        self.by_barcode: Dict[str, str] = {}
+        self.by_sku: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def index_product(self, product: dict):
+        product_id = product["id"]
+        self.remove_product(product_id)
+        barcode, sku = product.get("barcode"), product.get("sku")
+        self.products[product_id] = (barcode, sku, PRODUCT_LIST.document_json(product))
+        if barcode:
+            self.by_barcode[barcode] = product_id
+        if sku:
+            self.by_sku[sku] = product_id
+
+    def remove_product(self, product_id: str):
+        barcode, sku, _ = self.products.pop(product_id, (None, None, None))
+        # Syncs can apply writes out of order, so a code may already belong to another product
+        if self.by_barcode.get(barcode) == product_id:
+            del self.by_barcode[barcode]
+        if self.by_sku.get(sku) == product_id:
+            del self.by_sku[sku]
+
+    def get(self, code: str) -> Optional[bytes]:
+        """A scanned code is a barcode or, for items without one, the SKU label"""
+        product_id = self.by_barcode.get(code) or self.by_sku.get(code)
+        return self.products[product_id][2] if product_id else None
+
+    async def resolve(self, codes: List[str]) -> Dict[str, bytes]:
+        """JSON for every code that matches a product, reading the database only for misses"""
+        found = {}
+        for code in codes:
+            encoded = self.get(code)
+            if encoded is not None:
+                found[code] = encoded
+        missing = [code for code in codes if code not in found]
+        if missing:
+            query = {"$or": [{"barcode": {"$in": missing}}, {"sku": {"$in": missing}}]}
+            async for product in db.products.find(query, ProductIndexes.PROJECTION):
+                product_indexes.index_product(product)
+            for code in missing:
+                encoded = self.get(code)
+                if encoded is not None:
+                    found[code] = encoded
+        return found
+
+product_codes = ProductCodeIndex()
+
+PRODUCT_INDEX_SYNC_SECONDS = int(os.environ.get('PRODUCT_INDEX_SYNC_SECONDS', 2))
+PRODUCT_INDEX_CLOCK_SKEW_SECONDS = int(os.environ.get('PRODUCT_INDEX_CLOCK_SKEW_SECONDS', 1))
+
+class ProductIndexes:
+    """This worker's in-memory product indexes, kept in step with the products collection
+
+    Writes made through this worker update them directly. Writes from other workers
+    arrive through `sync`, which reads products by updated_at and deletions from
+    product_deletions.
+    """
+
+    # Re-read this far behind the high-water marks: a write stamped by a worker whose
+    # clock lags, or one that commits after a newer write was read, still lands in it
+    SYNC_OVERLAP = timedelta(seconds=PRODUCT_INDEX_SYNC_SECONDS + PRODUCT_INDEX_CLOCK_SKEW_SECONDS)
+    PROJECTION = {**PRODUCT_LIST.projection, "updated_at": 1}
+
+    def __init__(self, search: ProductSearchIndex, codes: ProductCodeIndex):
+        self.search = search
+        self.codes = codes
+        # (updated_at, id) of the newest product write applied, and newest deletion
+        self.high_water: Optional[tuple] = None
+        self.deleted_high_water: Optional[datetime] = None
+        # id -> updated_at of products applied inside the overlap, so re-reads are skipped
+        self.recent: Dict[str, datetime] = {}
+
+    def index_product(self, product: dict):
+        self.search.index_product(product)
+        self.codes.index_product(product)
+
+    def remove_product(self, product_id: str):
+        self.search.remove_product(product_id)
+        self.codes.remove_product(product_id)
+
+    async def rebuild(self):
+        """Index the whole catalog (startup)"""
+        started_at = datetime.utcnow()
+        with self.search.bulk_load():
+            async for product in db.products.find({}, self.PROJECTION).batch_size(STREAM_BATCH_SIZE):
+                self.index_product(product)
+        self.high_water = (started_at, "")
+        self.deleted_high_water = started_at
+        self.recent = {}
+
+    async def sync(self):
+        """Apply product writes and deletions made by other workers since the last sync"""
+        recent = {}
+        since = self.high_water[0] - self.SYNC_OVERLAP
+        async for product in db.products.find({"updated_at": {"$gte": since}}, self.PROJECTION):
+            product_id, updated_at = product["id"], product["updated_at"]
+            recent[product_id] = updated_at
+            if self.recent.get(product_id) != updated_at:
+                self.index_product(product)
+            self.high_water = max(self.high_water, (updated_at, product_id))
+        self.recent = recent
+
+        since = self.deleted_high_water - self.SYNC_OVERLAP
+        async for deletion in db.product_deletions.find({"deleted_at": {"$gte": since}}, {"_id": 0, "id": 1, "deleted_at": 1}):
+            self.remove_product(deletion["id"])
+            self.deleted_high_water = max(self.deleted_high_water, deletion["deleted_at"])
+
+product_indexes = ProductIndexes(product_search, product_codes)
+
+PRODUCT_DELETION_RETENTION_SECONDS = 24 * 3600
+
+async def ensure_product_indexes():
+    """Unique scan codes, updated_at for index syncs, low-stock alerts and expiring deletion markers"""
+    await db.products.create_index("sku", unique=True)
+    await db.products.create_index(
+        "barcode", unique=True, partialFilterExpression={"barcode": {"$type": "string"}}
+    )
+    await db.products.create_index("updated_at")
+    await db.products.create_index(
+        [("outlet_ids", ASCENDING), ("inventory_count", ASCENDING)], partialFilterExpression={"low_stock": True}
+    )
+    await db.product_deletions.create_index("deleted_at", expireAfterSeconds=PRODUCT_DELETION_RETENTION_SECONDS)
+
+@api_router.get("/products/by-barcode/{code}", response_model=Product)
+async def get_product_by_barcode(code: str):
+    """Resolve one scanned barcode (or SKU) to its product"""
+    found = await product_codes.resolve([code.strip()])
+    if not found:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return Response(next(iter(found.values())), media_type="application/json")
+
+@api_router.post("/products/lookup", response_model=ProductLookupResponse)
+async def lookup_products(request: ProductLookupRequest):
+    """Resolve a batch of scanned barcodes or SKUs in one round trip"""
+    codes = list(dict.fromkeys(code.strip() for code in request.codes))
+    found = await product_codes.resolve(codes)
+    products = b",".join(orjson.dumps(code) + b":" + encoded for code, encoded in found.items())
+    missing = orjson.dumps([code for code in codes if code not in found])
+    return Response(b'{"products":{' + products + b'},"missing":' + missing + b"}", media_type="application/json")
+
+# Inventory reservations
+# Stock is taken with a conditional $inc on the product (inventory_count >= quantity),
+# which MongoDB applies atomically per document, so concurrent checkouts can never sell
+# the same unit twice. Each hold is an inventory_reservations document that the order
+# commits; holds left past expires_at are given back in bulk by the sweeper.
+RESERVATION_TTL_SECONDS = int(os.environ.get('RESERVATION_TTL_SECONDS', 600))
+RESERVATION_SWEEP_SECONDS = 5
+RESERVATION_SWEEP_BATCH = 1000
+# Settled (committed or released) reservations are kept this long for support lookups
+RESERVATION_RETENTION_SECONDS = 7 * 24 * 3600
+# A product seen short of stock rejects larger requests in this worker for this long, so
+# a sold-out flash sale stops queueing writes on the product document
+STOCK_SHORTFALL_SECONDS = 1.0
+
+async def ensure_reservation_indexes():
+    """Id lookups, the sweeper's expiry scan, and expiry of settled reservations"""
+    await db.inventory_reservations.create_index("id", unique=True)
+    await db.inventory_reservations.create_index([("status", ASCENDING), ("expires_at", ASCENDING)])
+    await db.inventory_reservations.create_index("settled_at", expireAfterSeconds=RESERVATION_RETENTION_SECONDS)
+
+def taken_quantities(reservations: List[dict]) -> Dict[str, int]:
+    """Units per product that settling `reservations` gives back to stock"""
+    quantities: Dict[str, int] = {}
+    for reservation in reservations:
+        # Holds written before takes were recorded took every item
+        for item in reservation.get("taken", reservation["items"]):
+            quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+    return quantities
+
+class InventoryReservations:
+    """Takes, commits and gives back stock for checkouts"""
+
+    def __init__(self):
+        # product id -> (units last seen in stock, monotonic time the observation lapses)
+        self.shortfalls: Dict[str, tuple] = {}
+        # Products version bumps this worker has started; see publish_stock_change
+        self.bumps_started = 0
+        self.bump_lock = asyncio.Lock()
+
+    def known_shortfall(self, product_id: str, quantity: int) -> bool:
+        observed = self.shortfalls.get(product_id)
+        if observed is None:
+            return False
+        available, lapses_at = observed
+        if time.monotonic() >= lapses_at:
+            del self.shortfalls[product_id]
+            return False
+        return quantity > available
+
+    async def note_shortfall(self, product_id: str):
+        product = await db.products.find_one({"id": product_id}, {"_id": 0, "inventory_count": 1})
+        if product is None:
+            raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
+        self.shortfalls[product_id] = (product.get("inventory_count", 0), time.monotonic() + STOCK_SHORTFALL_SECONDS)
+
+    async def take(self, product_id: str, quantity: int) -> bool:
+        """Atomically remove `quantity` units if that many are in stock"""
+        product = await db.products.find_one_and_update(
+            {"id": product_id, "inventory_count": {"$gte": quantity}},
+            stock_change(-quantity),
+            projection={"_id": 0, "inventory_count": 1}
+        )
+        return product is not None
+
+    async def give_back(self, quantities: Dict[str, int]):
+        """Return units to stock, one unordered bulk write for any number of products"""
+        await db.products.bulk_write([
+            UpdateOne({"id": product_id}, stock_change(quantity)) for product_id, quantity in quantities.items()
+        ], ordered=False)
+        for product_id in quantities:
+            self.shortfalls.pop(product_id, None)
+        await self.publish_stock_change()
+
+    async def publish_stock_change(self):
+        """Bump the products version after stock moved, so list ETags never cover stale stock
+
+        Concurrent callers share bumps: a caller only needs one that started after its
+        own change landed, so at most one bump runs and one waits however busy the sale.
+        """
+        needed = self.bumps_started + 1
+        async with self.bump_lock:
+            if self.bumps_started >= needed:
+                return
+            self.bumps_started += 1
+            await bump_collection_version("products")
+
+    async def reserve(self, request: ReservationCreate) -> InventoryReservation:
+        quantities: Dict[str, int] = {}
+        for item in request.items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        for product_id, quantity in quantities.items():
+            if self.known_shortfall(product_id, quantity):
+                raise HTTPException(status_code=409, detail=f"Insufficient stock for product {product_id}")
+
+        now = datetime.utcnow()
+        reservation = InventoryReservation(
+            items=[ReservationItem(product_id=product_id, quantity=quantity) for product_id, quantity in quantities.items()],
+            status="pending",
+            order_id=request.order_id,
+            expires_at=now + timedelta(seconds=request.ttl_seconds or RESERVATION_TTL_SECONDS),
+            created_at=now
+        )
+        # The hold is written before any stock moves and records each take as it lands, so
+        # stock taken by a worker that dies mid-checkout is still found by the sweeper
+        await db.inventory_reservations.insert_one({**reservation.dict(), "taken": []})
+        # A fixed order keeps two multi-item checkouts from starving each other
+        product_ids = sorted(quantities)
+        unrecorded: Dict[str, int] = {}
+        try:
+            for position, product_id in enumerate(product_ids):
+                quantity = quantities[product_id]
+                if not await self.take(product_id, quantity):
+                    await self.note_shortfall(product_id)
+                    raise HTTPException(status_code=409, detail=f"Insufficient stock for product {product_id}")
+                unrecorded[product_id] = quantity
+                update = {"$push": {"taken": {"product_id": product_id, "quantity": quantity}}}
+                if position == len(product_ids) - 1:
+                    update["$set"] = {"status": "held"}
+                result = await db.inventory_reservations.update_one({"id": reservation.id, "status": "pending"}, update)
+                if not result.matched_count:
+                    raise HTTPException(status_code=409, detail="Reservation expired while taking stock")
+                del unrecorded[product_id]
+        except BaseException:
+            await self.abandon(reservation.id, unrecorded)
+            raise
+        await self.publish_stock_change()
+        reservation.status = "held"
+        return reservation
+
+    async def abandon(self, reservation_id: str, unrecorded: Dict[str, int]):
+        """Undo a reservation that failed part way: give back its recorded takes, unless the
+        sweeper already has, and any take that never made it onto the hold"""
+        reservation = await db.inventory_reservations.find_one_and_update(
+            {"id": reservation_id, "status": "pending"},
+            {"$set": {"status": "released", "settled_at": datetime.utcnow()}},
+            projection={"_id": 0, "taken": 1}
+        )
+        quantities = dict(unrecorded)
+        if reservation is not None:
+            for item in reservation["taken"]:
+                quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+        if quantities:
+            await self.give_back(quantities)
+
+    async def commit(self, reservation_id: str, order_id: Optional[str]) -> dict:
+        """Make a held reservation permanent; the stock it took is sold"""
+        now = datetime.utcnow()
+        update = {"status": "committed", "settled_at": now}
+        if order_id:
+            update["order_id"] = order_id
+        reservation = await db.inventory_reservations.find_one_and_update(
+            {"id": reservation_id, "status": "held", "expires_at": {"$gt": now}},
+            {"$set": update},
+            projection={"_id": 0}
+        )
+        if reservation is None:
+            raise await self.not_held(reservation_id)
+        return {**reservation, **update}
+
+    async def release(self, reservation_id: str) -> dict:
+        """Cancel a held reservation and put its stock back"""
+        update = {"status": "released", "settled_at": datetime.utcnow()}
+        reservation = await db.inventory_reservations.find_one_and_update(
+            {"id": reservation_id, "status": "held"},
+            {"$set": update},
+            projection={"_id": 0}
+        )
+        if reservation is None:
+            raise await self.not_held(reservation_id)
+        await self.give_back(taken_quantities([reservation]))
+        return {**reservation, **update}
+
+    async def not_held(self, reservation_id: str) -> HTTPException:
+        reservation = await db.inventory_reservations.find_one({"id": reservation_id}, {"_id": 0, "status": 1})
+        if reservation is None:
+            return HTTPException(status_code=404, detail="Reservation not found")
+        status = "expired" if reservation["status"] in ("pending", "held") else reservation["status"]
+        return HTTPException(status_code=409, detail=f"Reservation is already {status}")
+
+    async def sweep(self):
+        """Release expired holds in batches
+
+        Pending holds past expiry belong to checkouts that stalled or died while taking
+        stock; only the takes they recorded are given back.
+        """
+        now = datetime.utcnow()
+        unsettled = {"$in": ["pending", "held"]}
+        while True:
+            expired = await db.inventory_reservations.find(
+                {"status": unsettled, "expires_at": {"$lte": now}}, {"_id": 0, "id": 1}
+            ).limit(RESERVATION_SWEEP_BATCH).to_list(RESERVATION_SWEEP_BATCH)
+            if not expired:
+                break
+            # Claim with a sweep id first: a hold committed or released meanwhile is not
+            # matched, and one claimed by another worker's sweeper is not given back twice
+            sweep_id = str(uuid.uuid4())
+            await db.inventory_reservations.update_many(
+                {"id": {"$in": [reservation["id"] for reservation in expired]}, "status": unsettled},
+                {"$set": {"status": "released", "settled_at": now, "sweep_id": sweep_id}}
+            )
+            quantities = taken_quantities(await db.inventory_reservations.find(
+                {"sweep_id": sweep_id}, {"_id": 0, "items": 1, "taken": 1}
+            ).to_list(None))
+            if quantities:
+                await self.give_back(quantities)
+            if len(expired) < RESERVATION_SWEEP_BATCH:
+                break
+
+inventory_reservations = InventoryReservations()
+
+@api_router.post("/inventory/reservations", response_model=InventoryReservation)
+async def create_reservation(request: ReservationCreate):
+    """Hold stock for a checkout; 409 if any item is short"""
+    return await inventory_reservations.reserve(request)
+
+@api_router.get("/inventory/reservations/{reservation_id}", response_model=InventoryReservation)
+async def get_reservation(reservation_id: str):
+    reservation = await db.inventory_reservations.find_one({"id": reservation_id}, {"_id": 0})
+    if reservation is None:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return reservation
+
+@api_router.post("/inventory/reservations/{reservation_id}/commit", response_model=InventoryReservation)
+async def commit_reservation(reservation_id: str, order_id: Optional[str] = None):
+    """Convert a hold into a sale once the order is placed"""
+    return await inventory_reservations.commit(reservation_id, order_id)
+
+@api_router.delete("/inventory/reservations/{reservation_id}", response_model=InventoryReservation)
+async def release_reservation(reservation_id: str):
+    """Give a held reservation's stock back (abandoned checkout)"""
+    return await inventory_reservations.release(reservation_id)
+
+@api_router.post("/super-admin/products/{product_id}/inventory", response_model=Product)
+async def adjust_inventory(product_id: str, adjustment: InventoryAdjustment):
+    """Restock (positive delta) or write off (negative delta) without disturbing held stock"""
+    query = {"id": product_id}
+    if adjustment.delta < 0:
+        query["inventory_count"] = {"$gte": -adjustment.delta}
+    product = await db.products.find_one_and_update(
+        query,
+        stock_change(adjustment.delta),
+        projection=ProductIndexes.PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    if product is None:
+        if await db.products.count_documents({"id": product_id}, limit=1):
+            raise HTTPException(status_code=409, detail="Write-off exceeds the stock on hand")
+        raise HTTPException(status_code=404, detail="Product not found")
+    await bump_collection_version("products")
+    inventory_reservations.shortfalls.pop(product_id, None)
+    product_indexes.index_product(product)
+    return product
+
 # Order Management APIs
+async def ensure_order_indexes():
+    """Create the indexes backing order lookups and filtered listings"""
+    await db.orders.create_index("id", unique=True)
+    await db.orders.create_index(
+        [("outlet_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]
+    )
+    await db.orders.create_index([("outlet_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)])
+    await db.orders.create_index([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)])
+    await db.orders.create_index([("created_at", DESCENDING), ("id", DESCENDING)])
+
+async def seed_mock_orders():
+    """Insert the demo orders if they are missing (safe to run from every worker)"""
+    orders = [order.dict() for order in generate_mock_orders()]
+    result = await db.orders.bulk_write([
+        UpdateOne({"id": order["id"]}, {"$setOnInsert": order}, upsert=True)
+        for order in orders
+    ], ordered=False)
+    # Only the worker that actually inserted an order books its revenue
+    for index in result.upserted_ids:
+        if orders[index]["payment_status"] == "paid":
+            await record_order_payment(orders[index])
+
 @api_router.get("/super-admin/orders", response_model=List[Order])
-async def get_orders(status: Optional[str] = None, outlet_id: Optional[str] = None):
-    """Get all orders with optional filtering"""
-    orders = generate_mock_orders()
-    if status:
-        orders = [order for order in orders if order.status == status]
+async def get_orders(
+    status: Optional[str] = None,
+    outlet_id: Optional[str] = None,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None,
+    limit: int = Query(ORDER_LIST_DEFAULT_LIMIT, ge=1, le=ORDER_LIST_MAX_LIMIT)
+):
+    """Get orders, newest first (ties by id), with optional filtering
+
+    Pass the `created_at` and `id` of the last order received as `before` and
+    `before_id` to fetch the next page.
+    """
+    query = {}
     if outlet_id:
-        orders = [order for order in orders if order.outlet_id == outlet_id]
-    return orders
+        query["outlet_id"] = outlet_id
+    if status:
+        query["status"] = status
+    if before and before_id:
+        query["$or"] = [
+            {"created_at": {"$lt": before}},
+            {"created_at": before, "id": {"$lt": before_id}}
+        ]
+    elif before:
+        query["created_at"] = {"$lt": before}
+    
+    cursor = db.orders.find(query, ORDER_LIST.projection).sort([("created_at", DESCENDING), ("id", DESCENDING)]).limit(limit)
+    return ORDER_LIST.documents(await cursor.to_list(limit))
+
+def order_status_update(status: str, delivery_partner_id: Optional[str], now: datetime) -> dict:
+    update = {"status": status, "updated_at": now}
+    if delivery_partner_id:
+        update["delivery_partner_id"] = delivery_partner_id
+    return update
+
+async def refund_paid_order(order_id: str, update: dict) -> bool:
+    """Apply a refunded status to a paid order and book the refund; False if it was not paid
+
+    payment_status is flipped atomically, so a refund is only ever booked once.
+    """
+    order = await db.orders.find_one_and_update(
+        {"id": order_id, "payment_status": "paid"},
+        {"$set": {**update, "payment_status": "refunded", "refunded_at": update["updated_at"]}},
+        projection=REVENUE_ORDER_PROJECTION
+    )
+    if order:
+        await record_order_refund(order, update["updated_at"])
+    return order is not None
 
 @api_router.put("/super-admin/orders/{order_id}/status")
 async def update_order_status(order_id: str, status: str, delivery_partner_id: Optional[str] = None):
     """Update order status"""
+    update = order_status_update(status, delivery_partner_id, datetime.utcnow())
+    
+    if status == "refunded" and await refund_paid_order(order_id, update):
+        return {"message": f"Order {order_id} status updated to {status}"}
+    
+    result = await db.orders.update_one({"id": order_id}, {"$set": update})
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
     return {"message": f"Order {order_id} status updated to {status}"}
 
+@api_router.post("/super-admin/orders/status:batch", response_model=OrderStatusBatchResponse)
+async def update_order_statuses(batch: OrderStatusBatch):
+    """Apply many status changes at once (end-of-day reconciliation)
+
+    Changes land in one unordered bulk_write, after a single $in read that sorts out
+    unknown order ids. Refunds of paid orders are claimed first by one update_many that
+    flips payment_status and stamps this batch's token; reading the token back tells
+    which refunds this call issued, and their rollups are booked in one more bulk write.
+    """
+    now = datetime.utcnow()
+    latest = {change.order_id: index for index, change in enumerate(batch.changes)}
+    found = {
+        order["id"] async for order in db.orders.find({"id": {"$in": list(latest)}}, {"_id": 0, "id": 1})
+    }
+    changes = {order_id: batch.changes[index] for order_id, index in latest.items() if order_id in found}
+    updates = {
+        order_id: order_status_update(change.status, change.delivery_partner_id, now)
+        for order_id, change in changes.items()
+    }
+    refund_ids = [order_id for order_id, change in changes.items() if change.status == "refunded"]
+    refunded_ids = set()
+    if refund_ids:
+        refund_batch = str(uuid.uuid4())
+        await db.orders.update_many(
+            {"id": {"$in": refund_ids}, "payment_status": "paid"},
+            {"$set": {"payment_status": "refunded", "refunded_at": now, "refund_batch": refund_batch}}
+        )
+        refunded = await db.orders.find(
+            {"id": {"$in": refund_ids}, "refund_batch": refund_batch}, {**REVENUE_ORDER_PROJECTION, "id": 1}
+        ).to_list(None)
+        await record_order_refunds(refunded, now)
+        refunded_ids = {order["id"] for order in refunded}
+    if updates:
+        await db.orders.bulk_write(
+            [UpdateOne({"id": order_id}, {"$set": update}) for order_id, update in updates.items()], ordered=False
+        )
+    
+    results = []
+    for index, change in enumerate(batch.changes):
+        if latest[change.order_id] != index:
+            result = "superseded"
+        elif change.order_id not in found:
+            result = "not_found"
+        else:
+            result = "refunded" if change.order_id in refunded_ids else "updated"
+        results.append({"order_id": change.order_id, "result": result})
+    return {"results": results, "updated": len(changes), "not_found": len(latest) - len(changes)}
+
+# Bulk Export APIs
+EXPORT_MODELS = {
+    "orders": Order,
+    "products": Product,
+    "customers": Customer,
+}
+
+async def iter_csv(cursor, fields: List[str]) -> AsyncIterator[str]:
+    """Serialize documents from a motor cursor as CSV, flushing every STREAM_BATCH_SIZE rows
+
+    Nested values (order items, addresses, lists) are written as JSON inside their cell.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    rows = 1
+    async for doc in cursor:
+        writer.writerow([
+            json.dumps(value, default=json_default) if isinstance(value, (dict, list))
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+            for value in (doc.get(field) for field in fields)
+        ])
+        rows += 1
+        if rows >= STREAM_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if rows:
+        yield buffer.getvalue()
+
+def export_response(resource: str, cursor, format: str) -> StreamingResponse:
+    """Stream a collection export as NDJSON or CSV"""
+    cursor = cursor.batch_size(STREAM_BATCH_SIZE)
+    if format == "csv":
+        body = iter_csv(cursor, list(EXPORT_MODELS[resource].model_fields))
+        media_type = "text/csv"
+    else:
+        body = iter_ndjson(cursor)
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{resource}.{format}"'}
+    )
+
+@api_router.get("/super-admin/orders/export")
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = None,
+    outlet_id: Optional[str] = None
+):
+    """Stream all orders (optionally filtered) as NDJSON or CSV"""
+    query = {}
+    if outlet_id:
+        query["outlet_id"] = outlet_id
+    if status:
+        query["status"] = status
+    cursor = db.orders.find(query, {"_id": 0}).sort("created_at", DESCENDING)
+    return export_response("orders", cursor, format)
+
+@api_router.get("/super-admin/products/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = None
+):
+    """Stream the product catalog as NDJSON or CSV"""
+    query = {"status": status} if status else {}
+    return export_response("products", db.products.find(query, {"_id": 0}), format)
+
+@api_router.get("/super-admin/customers/export")
+async def export_customers(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = None
+):
+    """Stream all customers as NDJSON or CSV"""
+    query = {"status": status} if status else {}
+    return export_response("customers", db.customers.find(query, {"_id": 0}), format)
+
+# Bulk Import APIs
+# Uploads are read straight from python-multipart's spooled temporary file, validated
+# IMPORT_BATCH_SIZE rows at a time off the event loop, and upserted by SKU with one
+# unordered bulk_write per batch, so memory stays flat however large the catalog.
+# Progress and per-row errors stream back as NDJSON while the import runs.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+# CSV cells holding lists, written as JSON by the export
+PRODUCT_IMPORT_JSON_FIELDS = frozenset({"images", "outlet_ids"})
+# Taken from the file only when the import creates the product
+PRODUCT_IMPORT_INSERT_FIELDS = frozenset({"id", "created_at", *PRODUCT_MANAGED_FIELDS})
+
+def iter_import_rows(file, format: str):
+    """Yield (line, fields or error message) for each record of an uploaded CSV or NDJSON file"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, csv_import_fields(row)
+        return
+    for line, raw in enumerate(text, 1):
+        if not raw.strip():
+            continue
+        try:
+            fields = orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            yield line, f"Invalid JSON: {e}"
+            continue
+        yield line, fields if isinstance(fields, dict) else "Expected a JSON object"
+
+def csv_import_fields(row: dict):
+    """Fields of one CSV row: blank cells fall back to the model defaults, list cells are JSON"""
+    fields = {}
+    for name, value in row.items():
+        if name is None:
+            return "Row has more cells than the header"
+        if value is None or value == "":
+            continue
+        if name in PRODUCT_IMPORT_JSON_FIELDS:
+            try:
+                value = orjson.loads(value)
+            except orjson.JSONDecodeError:
+                return f"{name} must be a JSON list"
+        fields[name] = value
+    return fields
+
+def read_import_batch(rows) -> tuple:
+    """Validate the next IMPORT_BATCH_SIZE rows; returns (rows read, [(line, Product)], [error])"""
+    products, errors = [], []
+    read = 0
+    for line, fields in rows:
+        read += 1
+        if isinstance(fields, str):
+            errors.append({"type": "error", "line": line, "errors": [{"message": fields}]})
+        else:
+            try:
+                products.append((line, Product(**fields)))
+            except ValidationError as e:
+                errors.append({
+                    "type": "error",
+                    "line": line,
+                    "sku": fields.get("sku"),
+                    "errors": [
+                        {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                        for error in e.errors()
+                    ]
+                })
+        if read >= IMPORT_BATCH_SIZE:
+            break
+    return read, products, errors
+
+async def write_import_batch(products: List[tuple]) -> tuple:
+    """Upsert validated products by SKU; returns (inserted, updated, [superseded], [error])
+
+    A later row for the same SKU wins; the earlier ones are reported as superseded. Stock
+    is only set on products the import creates, and low_stock is derived in the same
+    pipeline as for any other product write.
+    """
+    now = datetime.utcnow()
+    latest_lines = {product.sku: line for line, product in products}
+    superseded = [
+        {"type": "superseded", "line": line, "sku": product.sku, "by_line": latest_lines[product.sku]}
+        for line, product in products if latest_lines[product.sku] != line
+    ]
+    latest = [(line, product) for line, product in products if latest_lines[product.sku] == line]
+    operations = []
+    for line, product in latest:
+        fields = {**product.dict(exclude=PRODUCT_IMPORT_INSERT_FIELDS), "updated_at": now}
+        operations.append(UpdateOne({"sku": product.sku}, [
+            {"$set": {
+                **{name: {"$literal": value} for name, value in fields.items()},
+                "id": {"$ifNull": ["$id", str(uuid.uuid4())]},
+                "created_at": {"$ifNull": ["$created_at", {"$literal": now}]},
+                "inventory_count": {"$ifNull": ["$inventory_count", product.inventory_count]},
+            }},
+            {"$set": PRODUCT_DERIVED_FIELDS},
+        ], upsert=True))
+    errors = []
+    try:
+        result = await db.products.bulk_write(operations, ordered=False)
+        inserted, updated = result.upserted_count, result.matched_count
+    except BulkWriteError as e:
+        inserted, updated = e.details["nUpserted"], e.details["nMatched"]
+        for error in e.details["writeErrors"]:
+            line, product = latest[error["index"]]
+            errors.append({
+                "type": "error",
+                "line": line,
+                "sku": product.sku,
+                "errors": [{"message": "SKU or barcode already in use" if error["code"] == 11000 else error["errmsg"]}]
+            })
+    return inserted, updated, superseded, errors
+
+async def iter_product_import(form, upload: UploadFile, format: str) -> AsyncIterator[str]:
+    """Run an import batch by batch, streaming each batch's row results and a progress line
+
+    Every row read ends up in exactly one of inserted, updated, superseded or failed.
+    """
+    totals = {"rows": 0, "inserted": 0, "updated": 0, "superseded": 0, "failed": 0}
+    try:
+        rows = iter_import_rows(upload.file, format)
+        while True:
+            try:
+                read, products, errors = await asyncio.to_thread(read_import_batch, rows)
+            except (UnicodeDecodeError, csv.Error) as e:
+                yield json.dumps({"type": "aborted", "message": f"Unreadable {format} file: {e}", **totals}) + "\n"
+                return
+            if not read:
+                break
+            superseded = []
+            if products:
+                try:
+                    inserted, updated, superseded, write_errors = await write_import_batch(products)
+                    await bump_collection_version("products")
+                    skus = [product.sku for _, product in products]
+                    stored = await db.products.find({"sku": {"$in": skus}}, ProductIndexes.PROJECTION).to_list(None)
+                except PyMongoError as e:
+                    # Rows of this batch may or may not have landed; totals cover earlier batches
+                    yield json.dumps({"type": "aborted", "message": f"Database error: {e}", **totals}) + "\n"
+                    return
+                # No await inside: the vocabulary stays unsorted until bulk_load exits,
+                # so no search or other import may run in between
+                with product_indexes.search.bulk_load():
+                    for product in stored:
+                        product_indexes.index_product(product)
+                errors += write_errors
+                totals["inserted"] += inserted
+                totals["updated"] += updated
+                totals["superseded"] += len(superseded)
+            totals["rows"] += read
+            totals["failed"] += len(errors)
+            lines = [json.dumps(result) for result in superseded + errors]
+            lines.append(json.dumps({"type": "progress", **totals}))
+            yield "\n".join(lines) + "\n"
+        yield json.dumps({"type": "done", **totals}) + "\n"
+    finally:
+        await form.close()
+
+@api_router.post("/super-admin/products/import")
+async def import_products(request: Request, format: Optional[str] = Query(None, pattern="^(ndjson|csv)$")):
+    """Upsert products by SKU from a CSV or NDJSON upload (multipart field "file")
+
+    The format defaults to the file extension. Responds with NDJSON: an "error" line per
+    rejected row, a "superseded" line per row overridden by a later row for the same SKU
+    in its batch, a "progress" line per batch, then "done" (or "aborted") with totals.
+    """
+    form = await request.form(max_files=1)
+    upload = form.get("file")
+    if not isinstance(upload, UploadFile):
+        await form.close()
+        raise HTTPException(status_code=400, detail='Upload the catalog as multipart field "file"')
+    format = format or IMPORT_FORMATS.get(Path(upload.filename or "").suffix.lower())
+    if format is None:
+        await form.close()
+        raise HTTPException(status_code=400, detail="Pass format=csv or format=ndjson for this file")
+    return StreamingResponse(iter_product_import(form, upload, format), media_type="application/x-ndjson")
+
 # Business Analytics APIs
 @api_router.get("/super-admin/analytics/dashboard")
 async def get_business_dashboard():
@@ -1021,7 +3673,7 @@ async def get_business_dashboard():
             {"outlet_name": "Downtown Store", "sales": 28900.50, "orders": 789},
             {"outlet_name": "Mall Branch", "sales": 16778.40, "orders": 445}
         ],
-        "recent_orders": generate_mock_orders()[:5]
+        "recent_orders": await db.orders.find({}, {"_id": 0}).sort("created_at", DESCENDING).to_list(5)
     }
 
 # Add your routes to the router instead of directly to app
@@ -1036,10 +3688,513 @@ async def create_status_check(input: StatusCheckCreate):
     _ = await db.status_checks.insert_one(status_obj.dict())
     return status_obj
 
+def json_default(value):
+    """JSON fallback for values stored by the models (datetimes)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+async def iter_ndjson(cursor, transform: Optional[Callable[[dict], dict]] = None) -> AsyncIterator[str]:
+    """Serialize documents from a motor cursor as NDJSON, flushing every STREAM_BATCH_SIZE rows"""
+    lines = []
+    async for doc in cursor:
+        if transform:
+            doc = transform(doc)
+        lines.append(json.dumps(doc, default=json_default))
+        if len(lines) >= STREAM_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def encode_status_cursor(status_check: dict) -> str:
+    """Encode the (timestamp, id) keyset position of a status check as an opaque cursor"""
+    position = json.dumps([status_check["timestamp"].isoformat(), status_check["id"]])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def decode_status_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by encode_status_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, status_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), str(status_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def ensure_status_check_indexes():
+    """Create the (timestamp, id) index backing keyset pagination"""
+    await db.status_checks.create_index([("timestamp", ASCENDING), ("id", ASCENDING)])
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=STATUS_CHECK_MAX_PAGE_SIZE),
+    stream: bool = False
+):
+    """List status checks ordered by (timestamp, id)
+
+    Pages are keyset-paginated: pass the `X-Next-Cursor` response header back as `cursor`.
+    With `stream=true` every remaining row is streamed as NDJSON instead.
+    """
+    query = {}
+    if cursor:
+        timestamp, status_id = decode_status_cursor(cursor)
+        query = {"$or": [
+            {"timestamp": {"$gt": timestamp}},
+            {"timestamp": timestamp, "id": {"$gt": status_id}}
+        ]}
+    
+    rows = db.status_checks.find(query, STATUS_CHECK_LIST.projection).sort([("timestamp", ASCENDING), ("id", ASCENDING)])
+    
+    if stream:
+        if limit:
+            rows = rows.limit(limit)
+        return StreamingResponse(
+            iter_ndjson(rows.batch_size(STREAM_BATCH_SIZE)),
+            media_type="application/x-ndjson"
+        )
+    
+    page_size = limit or STATUS_CHECK_PAGE_SIZE
+    status_checks = await rows.limit(page_size + 1).to_list(page_size + 1)
+    headers = {}
+    if len(status_checks) > page_size:
+        status_checks = status_checks[:page_size]
+        headers["X-Next-Cursor"] = encode_status_cursor(status_checks[-1])
+    return STATUS_CHECK_LIST.documents(status_checks, headers)
+
+@api_router.get("/analytics/performance/routes")
+async def get_route_latency():
+    """Get per-route latency percentiles, status-class counts and the in-flight gauge"""
+    return request_metrics.stats()
+
+# Response compression
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', 1024))
+# Levels per encoding for each profile; "max" trades CPU for bytes on metered kiosk links
+COMPRESSION_PROFILES = {
+    "fast": {"zstd": 1, "br": 1, "gzip": 1},
+    "default": {"zstd": 3, "br": 4, "gzip": 6},
+    "max": {"zstd": 6, "br": 5, "gzip": 9},
+}
+# Bodies at least this large are compressed on a worker thread (all three codecs release
+# the GIL), so a big catalog response never stalls the event loop
+COMPRESSION_THREAD_SIZE = 256 * 1024
+# Route template -> profile; routes not listed use "default"
+COMPRESSION_ROUTE_PROFILES = {
+    "/api/super-admin/products": "max",
+    "/api/super-admin/outlets": "max",
+    "/api/status": "fast",
+    "/api/super-admin/orders/export": "fast",
+    "/api/super-admin/products/export": "fast",
+    "/api/super-admin/customers/export": "fast",
+    "/api/super-admin/products/import": "fast",
+    "/api/products/lookup": "fast",
+    "/metrics": "fast",
+}
+COMPRESSIBLE_CONTENT_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                              "application/xml")
+
+class GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class BrotliStream:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+class ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+# Server preference when the client rates several encodings equally
+COMPRESSION_STREAMS = {
+    name: stream for name, stream, module in (
+        ("zstd", ZstdStream, zstandard),
+        ("br", BrotliStream, brotli),
+        ("gzip", GzipStream, zlib),
+    ) if module is not None
+}
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best available encoding from an Accept-Encoding header, honouring q-values"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in COMPRESSION_STREAMS:
+        weight = weights.get(name, wildcard)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+class CompressionMiddleware:
+    """Pure ASGI response compression negotiated from Accept-Encoding
+
+    Whole bodies under `minimum_size` go out untouched. Streaming responses are
+    compressed chunk by chunk and flushed after each one, so NDJSON consumers still
+    see rows as they are produced. The level comes from the route's profile in
+    COMPRESSION_ROUTE_PROFILES. Strong ETags are weakened on compressed responses,
+    since the encoded bytes differ from the representation the tag was issued for.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self._negotiated: Dict[str, Optional[str]] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = self.negotiate(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        stream = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None:
+                headers = start_message["headers"] = list(start_message.get("headers", []))
+                if not self.compressible(headers) or (not more_body and len(body) < self.minimum_size):
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                profile = COMPRESSION_PROFILES[COMPRESSION_ROUTE_PROFILES.get(route_template(scope), "default")]
+                stream = COMPRESSION_STREAMS[encoding](profile[encoding])
+                headers[:] = [(key, value) for key, value in headers if key != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                for index, (key, value) in enumerate(headers):
+                    if key == b"etag" and not value.startswith(b"W/"):
+                        headers[index] = (key, b"W/" + value)
+                if not more_body:
+                    body = await self.run(stream.finish, body)
+                    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+            await send({
+                "type": "http.response.body",
+                "body": await self.run(stream.compress if more_body else stream.finish, body),
+                "more_body": more_body
+            })
+
+        await self.app(scope, receive, send_wrapper)
+        if start_message is not None and stream is None:
+            # The app ended without a body message
+            await send(start_message)
+
+    @staticmethod
+    async def run(compress: Callable[[bytes], bytes], body: bytes) -> bytes:
+        if len(body) >= COMPRESSION_THREAD_SIZE:
+            return await asyncio.to_thread(compress, body)
+        return compress(body)
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        try:
+            return self._negotiated[accept_encoding]
+        except KeyError:
+            encoding = negotiate_encoding(accept_encoding)
+            if len(self._negotiated) < 256:
+                self._negotiated[accept_encoding] = encoding
+            return encoding
+
+    @staticmethod
+    def compressible(headers: list) -> bool:
+        """Text-like content that no one has encoded yet; also marks the response Vary"""
+        content_type = b""
+        for key, value in headers:
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value
+        if not content_type.decode("latin-1").startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return False
+        headers.append((b"vary", b"Accept-Encoding"))
+        return True
+
+# Runtime internals for /metrics
+EVENT_LOOP_LAG_INTERVAL_SECONDS = 0.5
+EVENT_LOOP_LAG_BOUNDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SLOW_CALLBACK_THRESHOLD_SECONDS = float(os.environ.get('SLOW_CALLBACK_THRESHOLD_SECONDS', 0.1))
+SLOW_CALLBACK_TICK_SECONDS = 0.02
+SLOW_CALLBACK_BOUNDS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+GC_PAUSE_BOUNDS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+# Route latency histograms are re-bucketed to these bounds (seconds) on export
+HTTP_DURATION_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HTTP_DURATION_BUCKETS = [latency_bucket(int(bound * 1_000_000)) for bound in HTTP_DURATION_BOUNDS]
+
+class EventLoopLagProbe:
+    """Measures how late a periodic sleep wakes up, i.e. how long the loop was busy"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag_seconds = BucketHistogram(EVENT_LOOP_LAG_BOUNDS)
+        self.last_lag = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - started - self.interval)
+            self.lag_seconds.observe(self.last_lag)
+
+event_loop_lag = EventLoopLagProbe(EVENT_LOOP_LAG_INTERVAL_SECONDS)
+
+def request_route(frame) -> str:
+    """Route template of the HTTP request whose handler is running in `frame`'s stack
+
+    Walks outwards to LatencyMiddleware.__call__ (or any ASGI frame) and reads its
+    `scope` local; the router has filled in scope["route"] by the time a handler runs.
+    """
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            return route_template(scope)
+        frame = frame.f_back
+    return "<background>"
+
+class SlowCallbackDetector:
+    """Watchdog thread that catches callbacks holding the event loop too long
+
+    The loop re-arms a cheap timer every `tick` seconds. When the watchdog sees no
+    tick for `threshold` seconds, the loop is stuck inside one callback: it samples
+    that thread's stack with sys._current_frames(), finds the route being served and
+    logs both once per stall. The loop's next tick measures how long the stall
+    lasted and charges it to that route. Unlike asyncio debug mode this costs
+    nothing per callback, so it can stay on in production.
+    """
+
+    def __init__(self, threshold: float, tick: float):
+        self.threshold = threshold
+        self.tick = tick
+        self.last_tick = time.monotonic()
+        self.blocked_seconds: Dict[str, BucketHistogram] = {}
+        self._stalled_route: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self.last_tick = time.monotonic()
+        self._loop.call_later(self.tick, self._on_tick)
+        threading.Thread(target=self._watch, name="slow-callback-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _on_tick(self):
+        now = time.monotonic()
+        route, self._stalled_route = self._stalled_route, None
+        if route is not None:
+            histogram = self.blocked_seconds.get(route)
+            if histogram is None:
+                histogram = self.blocked_seconds[route] = BucketHistogram(SLOW_CALLBACK_BOUNDS)
+            histogram.observe(now - self.last_tick - self.tick)
+        self.last_tick = now
+        if not self._stop.is_set():
+            self._loop.call_later(self.tick, self._on_tick)
+
+    def _watch(self):
+        reported_tick = None
+        while not self._stop.wait(self.threshold / 2):
+            last_tick = self.last_tick
+            if last_tick == reported_tick or time.monotonic() - last_tick - self.tick < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            reported_tick = last_tick
+            route = request_route(frame)
+            self._stalled_route = route
+            logger.warning(
+                "Event loop blocked for over %.0fms while serving %s:\n%s",
+                self.threshold * 1000, route, "".join(traceback.format_stack(frame))
+            )
+            del frame
+
+slow_callbacks = SlowCallbackDetector(SLOW_CALLBACK_THRESHOLD_SECONDS, SLOW_CALLBACK_TICK_SECONDS)
+
+class GarbageCollectorMonitor:
+    """Times stop-the-world GC passes through gc.callbacks"""
+
+    def __init__(self):
+        self.pause_seconds = BucketHistogram(GC_PAUSE_BOUNDS)
+        self.collections = [0, 0, 0]
+        self.collected = [0, 0, 0]
+        self._started = 0.0
+
+    def callback(self, phase: str, info: dict):
+        if phase == "start":
+            self._started = time.perf_counter()
+            return
+        self.pause_seconds.observe(time.perf_counter() - self._started)
+        self.collections[info["generation"]] += 1
+        self.collected[info["generation"]] += info["collected"]
+
+gc_monitor = GarbageCollectorMonitor()
+gc.callbacks.append(gc_monitor.callback)
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsExposition:
+    """Builds the Prometheus text exposition format (version 0.0.4)
+
+    Every sample carries a `worker` label so scrapes that land on different
+    uvicorn workers show up as separate series instead of resetting counters.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.worker = str(os.getpid())
+
+    def family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels):
+        labels["worker"] = self.worker
+        rendered = ",".join(f'{key}="{escape_label_value(label)}"' for key, label in labels.items())
+        self.lines.append(f"{name}{{{rendered}}} {float(value)!r}")
+
+    def histogram(self, name: str, buckets: List[tuple], total: float, count: int, **labels):
+        for bound, cumulative in buckets:
+            self.sample(f"{name}_bucket", cumulative, le="+Inf" if bound == math.inf else repr(float(bound)), **labels)
+        self.sample(f"{name}_sum", total, **labels)
+        self.sample(f"{name}_count", count, **labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+def route_duration_buckets(stats: RouteLatency) -> List[tuple]:
+    """Collapse an HDR route histogram onto HTTP_DURATION_BOUNDS (cumulative)"""
+    cumulative = list(accumulate(stats.histogram))
+    pairs = [(bound, cumulative[bucket]) for bound, bucket in zip(HTTP_DURATION_BOUNDS, HTTP_DURATION_BUCKETS)]
+    pairs.append((math.inf, stats.count))
+    return pairs
+
+def render_metrics() -> str:
+    out = MetricsExposition()
+
+    out.family("http_request_duration_seconds", "histogram", "HTTP request latency by route template")
+    for (method, path), stats in request_metrics.routes.items():
+        out.histogram("http_request_duration_seconds", route_duration_buckets(stats), stats.total_micros / 1_000_000,
+                      stats.count, method=method, route=path)
+    out.family("http_responses_total", "counter", "HTTP responses by route template and status class")
+    for (method, path), stats in request_metrics.routes.items():
+        for index, count in enumerate(stats.status_classes):
+            if count:
+                out.sample("http_responses_total", count, method=method, route=path,
+                           status_class=f"{index}xx" if index else "none")
+    out.family("http_requests_in_flight", "gauge", "HTTP requests currently being served")
+    out.sample("http_requests_in_flight", request_metrics.in_flight)
+
+    out.family("mongo_pool_checkouts_total", "counter", "Connections checked out of the Mongo pool")
+    out.sample("mongo_pool_checkouts_total", mongo_pool_metrics.checkouts)
+    out.family("mongo_pool_checkout_failures_total", "counter", "Failed Mongo pool check-outs")
+    out.sample("mongo_pool_checkout_failures_total", mongo_pool_metrics.checkout_failures)
+    out.family("mongo_pool_checked_out", "gauge", "Mongo connections currently checked out")
+    out.sample("mongo_pool_checked_out", mongo_pool_metrics.checked_out)
+    out.family("mongo_pool_connections", "gauge", "Open Mongo connections")
+    out.sample("mongo_pool_connections", mongo_pool_metrics.connections)
+    out.family("mongo_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a Mongo connection")
+    wait = mongo_pool_metrics.wait_seconds
+    out.histogram("mongo_pool_checkout_wait_seconds", wait.cumulative(), wait.total, wait.count)
+
+    caches = {
+        "principal": principal_cache.stats(),
+        "analytics_summary": analytics_summary_cache.stats()
+    }
+    out.family("cache_hits_total", "counter", "Cache lookups served from the cache")
+    for cache, stats in caches.items():
+        out.sample("cache_hits_total", stats["hits"] + stats.get("stale_hits", 0), cache=cache)
+    out.family("cache_misses_total", "counter", "Cache lookups that had to load")
+    for cache, stats in caches.items():
+        out.sample("cache_misses_total", stats["misses"], cache=cache)
+    out.family("cache_hit_ratio", "gauge", "Share of cache lookups served from the cache")
+    for cache, stats in caches.items():
+        hits = stats["hits"] + stats.get("stale_hits", 0)
+        lookups = hits + stats["misses"]
+        out.sample("cache_hit_ratio", hits / lookups if lookups else 0.0, cache=cache)
+
+    out.family("event_loop_lag_seconds", "histogram", "Delay of a periodic timer beyond its schedule")
+    lag = event_loop_lag.lag_seconds
+    out.histogram("event_loop_lag_seconds", lag.cumulative(), lag.total, lag.count)
+    out.family("event_loop_lag_last_seconds", "gauge", "Most recent event loop lag measurement")
+    out.sample("event_loop_lag_last_seconds", event_loop_lag.last_lag)
+
+    out.family("event_loop_blocked_seconds", "histogram",
+               "Callbacks that held the event loop past the slow-callback threshold, by route")
+    for route, blocked in slow_callbacks.blocked_seconds.items():
+        out.histogram("event_loop_blocked_seconds", blocked.cumulative(), blocked.total, blocked.count, route=route)
+
+    out.family("gc_pause_seconds", "histogram", "Duration of garbage collector passes")
+    pause = gc_monitor.pause_seconds
+    out.histogram("gc_pause_seconds", pause.cumulative(), pause.total, pause.count)
+    out.family("gc_collections_total", "counter", "Garbage collector passes by generation")
+    for generation, count in enumerate(gc_monitor.collections):
+        out.sample("gc_collections_total", count, generation=generation)
+    out.family("gc_collected_objects_total", "counter", "Objects freed by the garbage collector by generation")
+    for generation, count in enumerate(gc_monitor.collected):
+        out.sample("gc_collected_objects_total", count, generation=generation)
+
+    out.family("process_start_time_seconds", "gauge", "Start time of the worker since the unix epoch")
+    out.sample("process_start_time_seconds", PROCESS_STARTED_AT)
+    return out.render()
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint for this worker"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4")
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -1050,8 +4205,13 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+app.add_middleware(CompressionMiddleware)
+# Added last so it is outermost and the timing includes every other middleware
+app.add_middleware(LatencyMiddleware, metrics=request_metrics)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1059,6 +4219,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+background_tasks: List[asyncio.Task] = []
+
+async def run_periodically(interval: float, job: Callable):
+    """Run `job` every `interval` seconds until cancelled, logging failures"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception:
+            logger.exception("Background job %s failed", job.__qualname__)
+
+@app.on_event("startup")
+async def startup_db_client():
+    await ensure_order_indexes()
+    await ensure_status_check_indexes()
+    await ensure_revocation_indexes()
+    await ensure_user_indexes()
+    await ensure_signing_key_indexes()
+    await ensure_revenue_indexes()
+    await ensure_catalog_indexes()
+    await ensure_product_indexes()
+    await ensure_reservation_indexes()
+    await signing_keys.refresh()
+    await start_password_pool()
+    await seed_mock_orders()
+    await seed_demo_users()
+    await seed_catalog()
+    await product_indexes.rebuild()
+    await revocation_list.sync()
+    background_tasks.append(asyncio.create_task(run_periodically(REVOCATION_SYNC_SECONDS, revocation_list.sync)))
+    background_tasks.append(asyncio.create_task(run_periodically(JWT_KEY_REFRESH_SECONDS, signing_keys.refresh)))
+    background_tasks.append(asyncio.create_task(run_periodically(PRODUCT_INDEX_SYNC_SECONDS, product_indexes.sync)))
+    background_tasks.append(asyncio.create_task(run_periodically(RESERVATION_SWEEP_SECONDS, inventory_reservations.sweep)))
+    background_tasks.append(asyncio.create_task(run_periodically(PERFORMANCE_SAMPLE_SECONDS, process_sampler.sample)))
+    background_tasks.append(asyncio.create_task(run_periodically(PERFORMANCE_SAMPLE_SECONDS, request_metrics.flush)))
+    background_tasks.append(asyncio.create_task(event_loop_lag.run()))
+    slow_callbacks.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    slow_callbacks.stop()
+    for task in background_tasks:
+        task.cancel()
+    if password_executor:
+        password_executor.shutdown(wait=False, cancel_futures=True)
     client.close()
@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+"""
+Backend Performance Benchmark Suite
+Measures latency and throughput characteristics of the backend under load.
+
+Usage:
+    python performance_benchmark.py login-load [--logins 200] [--url http://localhost:8001/api]
+    python performance_benchmark.py flash-sale [--requests 5000] [--concurrency 200] [--stock 1000]
+    python performance_benchmark.py analytics [--orders 10000000] [--days 365]
+    python performance_benchmark.py middleware-overhead [--requests 200000]
+    python performance_benchmark.py serialization [--orders 10000] [--rounds 5]
+    python performance_benchmark.py product-search [--products 500000] [--queries 2000]
+    python performance_benchmark.py product-lookup [--products 500000] [--scans 100000]
+    python performance_benchmark.py product-import [--products 200000] [--url http://localhost:8001/api]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+# Get backend URL from environment - Testing on localhost as requested
+BACKEND_URL = "http://localhost:8001/api"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(label: str, samples: List[float]) -> Dict[str, float]:
+    """Print and return p50/p95/p99/max for latency samples in milliseconds"""
+    summary = {
+        "count": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else 0.0,
+    }
+    print(f"{label:<32} n={summary['count']:<6} p50={summary['p50']:8.2f}ms "
+          f"p95={summary['p95']:8.2f}ms p99={summary['p99']:8.2f}ms max={summary['max']:8.2f}ms")
+    return summary
+
+
+class LoginLoadBenchmark:
+    """Latency of an unrelated endpoint while a burst of concurrent logins runs"""
+
+    def __init__(self, base_url: str, logins: int):
+        self.base_url = base_url
+        self.logins = logins
+
+    def probe(self, stop: threading.Event, samples: List[float]):
+        """Hit GET /api/ back to back, recording latencies until stopped"""
+        session = requests.Session()
+        while not stop.is_set():
+            started = time.perf_counter()
+            session.get(f"{self.base_url}/")
+            samples.append((time.perf_counter() - started) * 1000)
+
+    def login(self, _: int) -> tuple:
+        started = time.perf_counter()
+        response = requests.post(f"{self.base_url}/auth/login",
+                                 json={"email": "customer@email.com", "password": "password123"})
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    def run(self):
+        print("=" * 80)
+        print("LOGIN LOAD BENCHMARK")
+        print("=" * 80)
+        print(f"Testing backend URL: {self.base_url}")
+        print(f"Concurrent logins: {self.logins}")
+        print()
+
+        # Baseline latency with no login traffic
+        baseline: List[float] = []
+        stop = threading.Event()
+        prober = threading.Thread(target=self.probe, args=(stop, baseline))
+        prober.start()
+        time.sleep(3)
+        stop.set()
+        prober.join()
+
+        # Same probe while the login burst runs
+        under_load: List[float] = []
+        stop = threading.Event()
+        prober = threading.Thread(target=self.probe, args=(stop, under_load))
+        prober.start()
+        with ThreadPoolExecutor(max_workers=self.logins) as pool:
+            results = list(pool.map(self.login, range(self.logins)))
+        stop.set()
+        prober.join()
+
+        statuses: Dict[int, int] = {}
+        for status_code, _ in results:
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+
+        summarize("GET /api/ (idle)", baseline)
+        summarize("GET /api/ (during logins)", under_load)
+        summarize("POST /api/auth/login", [latency for _, latency in results])
+        print(f"Login status codes: {statuses}")
+        if baseline and under_load:
+            print(f"p99 slowdown: {percentile(under_load, 99) / max(percentile(baseline, 99), 1e-6):.1f}x "
+                  f"(median idle {statistics.median(baseline):.2f}ms)")
+
+
+class FlashSaleBenchmark:
+    """Concurrent reservations against one SKU: throughput, latency and no overselling"""
+
+    PRODUCT_ID = "prd_003"
+
+    def __init__(self, base_url: str, requests_count: int, concurrency: int, stock: int):
+        self.base_url = base_url
+        self.requests_count = requests_count
+        self.concurrency = concurrency
+        self.stock = stock
+
+    def inventory(self) -> int:
+        products = requests.get(f"{self.base_url}/super-admin/products").json()
+        return next(product["inventory_count"] for product in products if product["id"] == self.PRODUCT_ID)
+
+    def reserve(self, _: int) -> tuple:
+        started = time.perf_counter()
+        response = requests.post(f"{self.base_url}/inventory/reservations",
+                                 json={"items": [{"product_id": self.PRODUCT_ID, "quantity": 1}]})
+        reservation_id = response.json()["id"] if response.status_code == 200 else None
+        return response.status_code, (time.perf_counter() - started) * 1000, reservation_id
+
+    def run(self):
+        print("=" * 80)
+        print("FLASH SALE BENCHMARK")
+        print("=" * 80)
+        print(f"Testing backend URL: {self.base_url}")
+        print(f"{self.requests_count} reservations of 1 unit, {self.concurrency} concurrent, {self.stock} in stock")
+        print()
+
+        delta = self.stock - self.inventory()
+        requests.post(f"{self.base_url}/super-admin/products/{self.PRODUCT_ID}/inventory", json={"delta": delta})
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self.reserve, range(self.requests_count)))
+        elapsed = time.perf_counter() - started
+
+        statuses: Dict[int, int] = {}
+        for status_code, _, _ in results:
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+        held = [reservation_id for _, _, reservation_id in results if reservation_id]
+        summarize("POST /api/inventory/reservations", [latency for _, latency, _ in results])
+        print(f"Throughput: {len(results) / elapsed:.0f} req/s, status codes: {statuses}")
+        print(f"Held {len(held)} of {self.stock} units, {self.inventory()} left "
+              f"({'OK' if len(held) + self.inventory() == self.stock else 'OVERSOLD'})")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(lambda reservation_id: requests.delete(f"{self.base_url}/inventory/reservations/{reservation_id}"), held))
+        print(f"Released the held units, {self.inventory()} in stock")
+
+
+class AnalyticsEngineBenchmark:
+    """Vectorized analytics engine vs. a row-by-row Python loop on synthetic orders"""
+
+    def __init__(self, orders: int, days: int, tenants: int = 200, customers: int = 1_000_000):
+        self.orders = orders
+        self.days = days
+        self.tenants = tenants
+        self.customers = customers
+
+    def generate(self) -> tuple:
+        rng = np.random.default_rng(42)
+        return (
+            rng.integers(0, self.days, self.orders),
+            rng.integers(0, self.tenants, self.orders),
+            rng.integers(0, self.customers, self.orders),
+            rng.gamma(2.0, 15.0, self.orders),
+        )
+
+    def run_vectorized(self, days, tenants, customers, totals) -> Dict[str, float]:
+        from server import (active_pairs, daily_totals, distinct_per_day, growth_rates,
+                            retention_per_day, rolling_distinct, safe_divide)
+        timings = {}
+
+        def timed(label, fn):
+            started = time.perf_counter()
+            result = fn()
+            timings[label] = (time.perf_counter() - started) * 1000
+            return result
+
+        revenue = timed("daily totals", lambda: daily_totals(days, totals, self.days))
+        timed("growth rates", lambda: growth_rates(revenue))
+        tenant_pairs = timed("tenant/day pairs", lambda: active_pairs(days, tenants, self.days))
+        tenant_counts = timed("distinct tenants/day", lambda: distinct_per_day(tenant_pairs, self.days))
+        timed("per-tenant average", lambda: safe_divide(revenue, tenant_counts))
+        customer_pairs = timed("customer/day pairs", lambda: active_pairs(days, customers, self.days))
+        timed("daily active customers", lambda: distinct_per_day(customer_pairs, self.days))
+        timed("day-over-day retention", lambda: retention_per_day(customer_pairs, self.days))
+        timed("30-day active customers", lambda: rolling_distinct(customer_pairs, self.days, 30))
+        return timings
+
+    def run_loop(self, days, tenants, customers, totals) -> float:
+        """The same daily totals, tenant counts, DAU and retention computed row by row"""
+        started = time.perf_counter()
+        revenue = [0.0] * self.days
+        tenant_sets = [set() for _ in range(self.days)]
+        customer_sets = [set() for _ in range(self.days)]
+        for day, tenant, customer, total in zip(days.tolist(), tenants.tolist(), customers.tolist(), totals.tolist()):
+            revenue[day] += total
+            tenant_sets[day].add(tenant)
+            customer_sets[day].add(customer)
+        for day in range(1, self.days):
+            previous = customer_sets[day - 1]
+            if previous:
+                len(customer_sets[day] & previous) / len(previous)
+            if revenue[day - 1]:
+                (revenue[day] - revenue[day - 1]) / revenue[day - 1]
+        return (time.perf_counter() - started) * 1000
+
+    def run(self):
+        sys.path.insert(0, BACKEND_DIR)
+        print("=" * 80)
+        print("ANALYTICS ENGINE BENCHMARK")
+        print("=" * 80)
+        print(f"Synthetic orders: {self.orders:,} over {self.days} days, "
+              f"{self.tenants} tenants, {self.customers:,} customers")
+        print()
+
+        columns = self.generate()
+        timings = self.run_vectorized(*columns)
+        for label, elapsed in timings.items():
+            print(f"{label:<32} {elapsed:10.1f}ms")
+        vectorized_total = sum(timings.values())
+        print(f"{'vectorized total':<32} {vectorized_total:10.1f}ms")
+
+        # The loop is too slow to run on every row; time a sample and scale it up
+        sample = min(self.orders, 1_000_000)
+        loop_ms = self.run_loop(*(column[:sample] for column in columns)) * (self.orders / sample)
+        label = "python loop" + (" (extrapolated)" if sample < self.orders else "")
+        print(f"{label:<32} {loop_ms:10.1f}ms")
+        print(f"Speedup: {loop_ms / vectorized_total:.1f}x")
+
+
+class MiddlewareOverheadBenchmark:
+    """Per-request cost of the latency middleware around a no-op ASGI app"""
+
+    def __init__(self, requests: int):
+        self.requests = requests
+
+    async def measure(self) -> tuple:
+        from server import LatencyMiddleware, RequestMetrics
+
+        async def endpoint(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": "/api/"}
+        metrics = RequestMetrics()
+        middleware = LatencyMiddleware(endpoint, metrics)
+
+        started = time.perf_counter()
+        for _ in range(self.requests):
+            await endpoint(scope, None, send)
+        bare = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(self.requests):
+            await middleware(scope, None, send)
+        wrapped = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await metrics.flush()
+        flush = time.perf_counter() - started
+        return bare, wrapped, flush
+
+    def run(self):
+        sys.path.insert(0, BACKEND_DIR)
+        print("=" * 80)
+        print("LATENCY MIDDLEWARE OVERHEAD BENCHMARK")
+        print("=" * 80)
+        bare, wrapped, flush = asyncio.run(self.measure())
+        print(f"{'no-op app':<32} {bare / self.requests * 1e6:10.2f}us/request")
+        print(f"{'no-op app + middleware':<32} {wrapped / self.requests * 1e6:10.2f}us/request")
+        print(f"{'middleware overhead':<32} {(wrapped - bare) / self.requests * 1e6:10.2f}us/request")
+        print(f"{'flush of buffered samples':<32} {flush * 1000:10.2f}ms for {self.requests:,} requests")
+
+
+class SerializationBenchmark:
+    """Response serialization paths for a List[Order] response of N orders"""
+
+    def __init__(self, orders: int, rounds: int):
+        self.orders = orders
+        self.rounds = rounds
+
+    def build_orders(self) -> list:
+        from datetime import datetime, timedelta
+        from server import Order, generate_mock_orders
+        templates = generate_mock_orders()
+        now = datetime.utcnow()
+        return [
+            Order(**{
+                **templates[i % len(templates)].dict(),
+                "id": f"ord_{i:07d}",
+                "order_number": f"ORD-{i:07d}",
+                "created_at": now - timedelta(minutes=i),
+            })
+            for i in range(self.orders)
+        ]
+
+    def timed(self, label: str, fn) -> float:
+        """Best-of-rounds wall time in milliseconds; prints throughput"""
+        best = float("inf")
+        size = 0
+        for _ in range(self.rounds):
+            started = time.perf_counter()
+            size = len(fn())
+            best = min(best, (time.perf_counter() - started) * 1000)
+        print(f"{label:<44} {best:9.1f}ms {self.orders / best * 1000:12,.0f} orders/s {size / 1e6:8.2f}MB")
+        return best
+
+    def run(self):
+        sys.path.insert(0, BACKEND_DIR)
+        from typing import List as ListType
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse, ORJSONResponse
+        from fastapi.routing import serialize_response
+        from fastapi.utils import create_response_field
+        from server import ORDER_LIST, Order
+
+        print("=" * 80)
+        print("RESPONSE SERIALIZATION BENCHMARK")
+        print("=" * 80)
+        print(f"Orders per response: {self.orders:,} (best of {self.rounds} rounds)")
+        print()
+
+        orders = self.build_orders()
+        field = create_response_field(name="Response_get_orders", type_=ListType[Order], mode="serialization")
+
+        def response_model(response_class, content=None):
+            content = asyncio.run(serialize_response(field=field, response_content=orders if content is None else content))
+            return response_class(content).body
+
+        baseline = self.timed("jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(orders)).body)
+        default = self.timed("response_model + JSONResponse (old default)", lambda: response_model(JSONResponse))
+        fast = self.timed("response_model + ORJSONResponse (api_router)", lambda: response_model(ORJSONResponse))
+        print(f"Speedup over the old default: {default / fast:.1f}x "
+              f"({baseline / fast:.1f}x over jsonable_encoder + json.dumps)")
+        print()
+
+        # get_orders used to build Order(**doc) from each Mongo document and then let
+        # response_model validate them all over again
+        documents = [order.dict() for order in orders]
+        revalidated = self.timed("Order(**doc) + response_model re-validation",
+                                 lambda: response_model(ORJSONResponse, [Order(**document) for document in documents]))
+        self.timed("ListSerializer.models (validated models)", lambda: ORDER_LIST.models(orders).body)
+        trusted = self.timed("ListSerializer.documents (raw Mongo documents)", lambda: ORDER_LIST.documents(documents).body)
+        print(f"Speedup of the trusted-document path: {revalidated / trusted:.1f}x")
+
+
+class ProductSearchBenchmark:
+    """Keystroke-by-keystroke autocomplete latency of the in-process product index"""
+
+    CATEGORIES = 60
+    OUTLETS = 200
+
+    def __init__(self, products: int, queries: int):
+        self.products = products
+        self.queries = queries
+        self.rng = np.random.default_rng(7)
+
+    def vocabulary(self, size: int) -> List[str]:
+        letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+        lengths = self.rng.integers(3, 11, size)
+        return ["".join(self.rng.choice(letters, length)) for length in lengths]
+
+    def zipf_words(self, words: List[str], count: int) -> List[str]:
+        ranks = np.minimum(self.rng.zipf(1.3, count), len(words)) - 1
+        return [words[rank] for rank in ranks]
+
+    def build_catalog(self) -> List[dict]:
+        words = self.vocabulary(40_000)
+        categories = self.vocabulary(self.CATEGORIES)
+        name_words = iter(self.zipf_words(words, self.products * 3))
+        description_words = iter(self.zipf_words(words, self.products * 8))
+        catalog = []
+        for i in range(self.products):
+            catalog.append({
+                "id": f"prd_{i:07d}",
+                "name": " ".join(next(name_words) for _ in range(3)),
+                "description": " ".join(next(description_words) for _ in range(8)),
+                "category": categories[i % self.CATEGORIES],
+                "sku": f"SKU-{i:07d}",
+                "status": "active",
+                "outlet_ids": [f"out_{(i * 7 + k) % self.OUTLETS:03d}" for k in range(1 + i % 3)],
+            })
+        return catalog
+
+    def keystrokes(self, catalog: List[dict]) -> List[tuple]:
+        """Every prefix of sampled product names as typed, a share of them with a typo"""
+        queries = []
+        while len(queries) < self.queries:
+            product = catalog[int(self.rng.integers(len(catalog)))]
+            name = product["name"]
+            if self.rng.random() < 0.2:
+                position = int(self.rng.integers(1, len(name)))
+                name = name[:position] + name[position + 1:]
+            outlet = product["outlet_ids"][0] if self.rng.random() < 0.5 else None
+            queries.extend((name[:length], outlet) for length in range(1, len(name) + 1) if name[length - 1] != " ")
+        return queries[:self.queries]
+
+    def run(self):
+        sys.path.insert(0, BACKEND_DIR)
+        import resource
+        from server import ProductSearchIndex
+
+        print("=" * 80)
+        print("PRODUCT SEARCH BENCHMARK")
+        print("=" * 80)
+        catalog = self.build_catalog()
+        print(f"Catalog: {self.products:,} products, {self.OUTLETS} outlets")
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        index = ProductSearchIndex()
+        started = time.perf_counter()
+        with index.bulk_load():
+            for product in catalog:
+                index.index_product(product)
+        build_seconds = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"Index build: {build_seconds:.1f}s, {len(index.vocabulary):,} terms, "
+              f"peak RSS +{(rss_after - rss_before) / 1024:.0f}MB")
+        print()
+
+        latencies: Dict[str, List[float]] = {"any outlet": [], "one outlet": []}
+        for query, outlet in self.keystrokes(catalog):
+            started = time.perf_counter()
+            index.search(query, outlet, 10)
+            latencies["one outlet" if outlet else "any outlet"].append((time.perf_counter() - started) * 1000)
+        for label, samples in latencies.items():
+            summarize(f"search ({label})", samples)
+        summarize("search (all keystrokes)", latencies["any outlet"] + latencies["one outlet"])
+
+
+class ProductLookupBenchmark:
+    """Kiosk scan resolution from the in-process barcode/SKU map"""
+
+    BATCH_SIZE = 500
+
+    def __init__(self, products: int, scans: int):
+        self.products = products
+        self.scans = scans
+        self.rng = np.random.default_rng(11)
+
+    def build_catalog(self) -> List[dict]:
+        return [{
+            "id": f"prd_{i:07d}",
+            "name": f"Product {i}",
+            "description": "Synthetic catalog item",
+            "category": "General",
+            "price": 9.99,
+            "cost": 4.5,
+            "sku": f"SKU-{i:07d}",
+            "barcode": f"{5_000_000_000_000 + i}",
+            "status": "active",
+            "inventory_count": 100,
+            "outlet_ids": ["out_001"],
+        } for i in range(self.products)]
+
+    def run(self):
+        sys.path.insert(0, BACKEND_DIR)
+        from server import ProductLookupRequest, get_product_by_barcode, lookup_products, product_codes
+
+        print("=" * 80)
+        print("PRODUCT LOOKUP BENCHMARK")
+        print("=" * 80)
+        catalog = self.build_catalog()
+        started = time.perf_counter()
+        for product in catalog:
+            product_codes.index_product(product)
+        print(f"Index build: {self.products:,} products in {time.perf_counter() - started:.1f}s")
+        print()
+
+        codes = [product["barcode"] if i % 4 else product["sku"] for i, product in enumerate(catalog)]
+        picks = self.rng.integers(len(codes), size=self.scans)
+
+        async def scans() -> List[float]:
+            timings = []
+            for pick in picks:
+                started = time.perf_counter()
+                await get_product_by_barcode(codes[pick])
+                timings.append((time.perf_counter() - started) * 1000)
+            return timings
+
+        async def batches() -> List[float]:
+            timings = []
+            for start in range(0, min(self.scans, 100 * self.BATCH_SIZE), self.BATCH_SIZE):
+                request = ProductLookupRequest(codes=[codes[pick] for pick in picks[start:start + self.BATCH_SIZE]])
+                started = time.perf_counter()
+                await lookup_products(request)
+                timings.append((time.perf_counter() - started) * 1000)
+            return timings
+
+        summarize("single scan", asyncio.run(scans()))
+        summarize(f"batch lookup ({self.BATCH_SIZE} codes)", asyncio.run(batches()))
+
+
+class ProductImportBenchmark:
+    """Streamed NDJSON catalog import: load time, then a second pass that only updates"""
+
+    def __init__(self, base_url: str, products: int):
+        self.base_url = base_url
+        self.products = products
+
+    def write_catalog(self, file):
+        for i in range(self.products):
+            file.write(json.dumps({
+                "name": f"Import benchmark item {i}", "description": "Synthetic catalog entry",
+                "category": f"bench-{i % 50}", "price": 1.0 + i % 100, "cost": 0.5 + i % 100,
+                "sku": f"BENCH-{i:07d}", "barcode": f"99{i:011d}", "status": "active",
+                "inventory_count": 100, "outlet_ids": ["out_001"],
+            }).encode() + b"\n")
+        file.seek(0)
+
+    def upload(self, label: str, file) -> dict:
+        file.seek(0)
+        started = time.perf_counter()
+        response = requests.post(f"{self.base_url}/super-admin/products/import",
+                                 files={"file": ("catalog.ndjson", file)}, stream=True)
+        totals, first_progress = {}, None
+        for line in response.iter_lines():
+            event = json.loads(line)
+            if event["type"] == "progress" and first_progress is None:
+                first_progress = time.perf_counter() - started
+            totals = event
+        elapsed = time.perf_counter() - started
+        print(f"{label:<10} {elapsed:8.1f}s  {totals.get('rows', 0) / elapsed:8.0f} rows/s  "
+              f"first progress after {first_progress or 0:.2f}s  {totals}")
+        return totals
+
+    def run(self):
+        print("=" * 80)
+        print("PRODUCT IMPORT BENCHMARK")
+        print("=" * 80)
+        print(f"Testing backend URL: {self.base_url}")
+        print(f"{self.products} products as NDJSON")
+        print()
+
+        with tempfile.TemporaryFile() as file:
+            self.write_catalog(file)
+            self.upload("insert", file)
+            self.upload("update", file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend performance benchmarks")
+    subcommands = parser.add_subparsers(dest="benchmark", required=True)
+
+    login_load = subcommands.add_parser("login-load", help="p99 of unrelated endpoints during a login burst")
+    login_load.add_argument("--logins", type=int, default=200)
+    login_load.add_argument("--url", default=BACKEND_URL)
+
+    flash_sale = subcommands.add_parser("flash-sale", help="concurrent reservations against one SKU")
+    flash_sale.add_argument("--requests", type=int, default=5000)
+    flash_sale.add_argument("--concurrency", type=int, default=200)
+    flash_sale.add_argument("--stock", type=int, default=1000)
+    flash_sale.add_argument("--url", default=BACKEND_URL)
+
+    analytics = subcommands.add_parser("analytics", help="vectorized analytics engine on synthetic orders")
+    analytics.add_argument("--orders", type=int, default=10_000_000)
+    analytics.add_argument("--days", type=int, default=365)
+
+    overhead = subcommands.add_parser("middleware-overhead", help="per-request cost of the latency middleware")
+    overhead.add_argument("--requests", type=int, default=200_000)
+
+    serialization = subcommands.add_parser("serialization", help="List[Order] response serialization paths")
+    serialization.add_argument("--orders", type=int, default=10_000)
+    serialization.add_argument("--rounds", type=int, default=5)
+
+    product_search = subcommands.add_parser("product-search", help="autocomplete latency on a synthetic catalog")
+    product_search.add_argument("--products", type=int, default=500_000)
+    product_search.add_argument("--queries", type=int, default=2000)
+
+    product_lookup = subcommands.add_parser("product-lookup", help="barcode/SKU scan resolution")
+    product_lookup.add_argument("--products", type=int, default=500_000)
+    product_lookup.add_argument("--scans", type=int, default=100_000)
+
+    product_import = subcommands.add_parser("product-import", help="streamed bulk catalog import")
+    product_import.add_argument("--products", type=int, default=200_000)
+    product_import.add_argument("--url", default=BACKEND_URL)
+
+    args = parser.parse_args()
+    if args.benchmark == "login-load":
+        LoginLoadBenchmark(args.url, args.logins).run()
+    elif args.benchmark == "flash-sale":
+        FlashSaleBenchmark(args.url, args.requests, args.concurrency, args.stock).run()
+    elif args.benchmark == "analytics":
+        AnalyticsEngineBenchmark(args.orders, args.days).run()
+    elif args.benchmark == "middleware-overhead":
+        MiddlewareOverheadBenchmark(args.requests).run()
+    elif args.benchmark == "serialization":
+        SerializationBenchmark(args.orders, args.rounds).run()
+    elif args.benchmark == "product-search":
+        ProductSearchBenchmark(args.products, args.queries).run()
+    elif args.benchmark == "product-lookup":
+        ProductLookupBenchmark(args.products, args.scans).run()
+    elif args.benchmark == "product-import":
+        ProductImportBenchmark(args.url, args.products).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())